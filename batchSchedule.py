@@ -0,0 +1,153 @@
+import argparse
+import collections
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import json
+import os
+import time
+import zipfile
+
+import displaySchedule
+from scheduleCache import MemoryCache, RenderCache
+from scheduleProfile import StageProfiler, profileStage
+
+# =============================================================================
+# Render many schedules in one process pool
+# =============================================================================
+
+parser = argparse.ArgumentParser(description='Render every schedule in a manifest with a pool of worker processes')
+
+parser.add_argument('manifest', type=str, help='JSON file with a list of jobs. Each job needs "year" and "team", and can set "fn", "config_file", "highlight_file", "output", "formats", "dpi", or any other parameter from displaySchedule.py')
+parser.add_argument('--workers', type=int, help='Number of worker processes. Default is the number of CPUs.')
+parser.add_argument('--cache_dir', type=str, help='Render cache directory shared by all the workers. Default is no cache.')
+parser.add_argument('--cache_size', type=float, default=100, help='Maximum size of the render cache in MB')
+parser.add_argument('--report', type=str, help='JSON file for the per-job status and timing report. Default prints it.')
+parser.add_argument('--league', type=str, help='League-wide schedule, in the MLB .csv formatting. It is read once for every team in the manifest, rather than once per job, and is the default "fn" of every job. Any "start" set by a job or its config file is kept.')
+parser.add_argument('--pages', type=str, help='Instead of a file per job, save every job as a page of this one file, in the order of the manifest: a .pdf, or a .zip with a file per page in the job\'s first format. Jobs can give their highlights inline as "highlights", and name their page in the .zip with "name".')
+parser.add_argument('--window', type=int, help='Most .zip pages rendered ahead of the one being written', default=32)
+parser.add_argument('--profile', action='store_true', help='Add the time and memory allocations of each stage, the number of artists, and the output sizes to each job in the report')
+
+# Job keys that aren't parameters of displaySchedule.py
+JOB_KEYS = ['year', 'team', 'config_file', 'output', 'formats', 'dpi', 'name', 'highlights']
+
+def _jobParameters(job):
+    config = displaySchedule._readConfig(job.get('config_file'))
+    overrides = {key: value for key, value in job.items() if key not in JOB_KEYS}
+    return displaySchedule.ScheduleConfig(str(job['year']), job['team'], config, overrides)
+
+def _renderJob(job, games=None, highlights=None, cache_dir=None, cache_size=100, profile=False):
+    # games are the team's already parsed games, from streamLeagueSchedule, and highlights its HighlightIndex, if there are any,
+    # or the ValueError from reading its highlight file, which is reported as the job's error
+    t0 = time.perf_counter()
+    try:
+        if isinstance(highlights, ValueError):
+            raise highlights
+        cache = RenderCache(cache_dir, cache_size*2**20) if cache_dir else None
+        profiler = StageProfiler() if profile else None
+        with profileStage(profiler, 'config'):
+            p = _jobParameters(job)
+        outputs = displaySchedule.makeSchedule(p, job.get('output'), formats=job.get('formats'), dpi=job.get('dpi'), cache=cache, profiler=profiler, games=games, highlights=highlights)
+        entry = {'year': str(job['year']), 'team': job['team'], 'status': 'ok', 'outputs': outputs, 'seconds': time.perf_counter() - t0}
+        if profiler is not None:
+            entry['profile'] = profiler.report()
+        return entry
+    except Exception as e:
+        return {'year': str(job.get('year')), 'team': job.get('team'), 'status': 'error', 'error': f'{type(e).__name__}: {e}', 'seconds': time.perf_counter() - t0}
+
+def _prepareJobs(jobs, league=None):
+    # The jobs, with each team's games parsed once from a league schedule, and each highlight file read once, shared by every job that uses it
+    # A highlight file that can't be read gives its jobs the ValueError in place of a HighlightIndex, so only they fail
+    # The league is streamed once for each different start the jobs ask for, from the job or its config file
+    games = [None]*len(jobs)
+    if league is not None:
+        jobs = [dict(job, fn=job.get('fn', league)) for job in jobs]
+        starts = {}
+        for i, job in enumerate(jobs):
+            if job['fn'] == league:
+                try:
+                    start = _jobParameters(job)['start']
+                except Exception:
+                    continue
+                # Bad parameters leave the job to read its own file, and fail there
+                if start is None or (isinstance(start, int) and start >= 0):
+                    starts[i] = start
+        for start in set(starts.values()):
+            seasons = dict(displaySchedule.streamLeagueSchedule(league, {jobs[i]['team'] for i in starts if starts[i] == start}, start))
+            for i in starts:
+                if starts[i] == start:
+                    games[i] = seasons.get(jobs[i]['team'])
+    indexes = {}
+    for fn in {job.get('highlight_file') for job in jobs}:
+        if fn:
+            try:
+                indexes[fn] = displaySchedule._readHighlights(fn)
+            except ValueError as e:
+                indexes[fn] = e
+    highlights = [job['highlights'] if 'highlights' in job else indexes.get(job.get('highlight_file')) for job in jobs]
+    return jobs, games, highlights
+
+def renderBatch(jobs, workers=None, cache_dir=None, cache_size=100, profile=False, league=None):
+    # Returns one report entry per job, in the order of the jobs
+    # With a league schedule, it is parsed once here, and each worker is sent only its team's games
+    jobs, games, highlights = _prepareJobs(jobs, league)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(functools.partial(_renderJob, cache_dir=cache_dir, cache_size=cache_size, profile=profile), jobs, games, highlights))
+
+# Each worker process keeps its own parsed schedules between the pages it renders
+_page_cache = None
+
+def _renderPage(job, games=None, highlights=None):
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = MemoryCache(64)
+    fmt = (job.get('formats') or ['pdf'])[0]
+    return fmt, displaySchedule.renderSchedule(_jobParameters(job), fmt, dpi=job.get('dpi'), highlights=highlights, cache=_page_cache, games=games)
+
+def _orderedResults(pool, fn, arguments, window):
+    # pool.map, but with at most window calls submitted ahead of the result being used, so the finished pages waiting to be written stay bounded
+    pending = collections.deque()
+    for args in arguments:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def renderPages(jobs, output, workers=None, league=None, window=32):
+    # Save every job as a page of one output, in the order of the jobs, and return the number of pages
+    # A .zip has its pages rendered in parallel by the workers, and written as they come in. The pages of a .pdf all go
+    # through one PdfPages file, so they are drawn here, in turn, on the one template figure, sharing the parsed schedules.
+    jobs, games, highlights = _prepareJobs(jobs, league)
+    for highlight in highlights:
+        if isinstance(highlight, ValueError):
+            raise highlight # There is no page to leave out, so the whole file fails
+    
+    if os.path.splitext(output)[1] == '.zip':
+        with ProcessPoolExecutor(max_workers=workers) as pool, displaySchedule._atomicFile(output) as f, zipfile.ZipFile(f, 'w') as archive:
+            for i, (job, (fmt, data)) in enumerate(zip(jobs, _orderedResults(pool, _renderPage, zip(jobs, games, highlights), window))):
+                name = job.get('name', f'{i+1:04d}_{job["year"]}_{job["team"]}')
+                archive.writestr(f'{name}.{fmt}', data)
+        return len(jobs)
+    
+    cache = MemoryCache(64)
+    return displaySchedule.renderPages(((_jobParameters(job), highlight, season) for job, highlight, season in zip(jobs, highlights, games)), output, cache=cache)
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    jobs = json.load(open(args.manifest))
+
+    t0 = time.perf_counter()
+    if args.pages:
+        report = {'output': args.pages, 'pages': renderPages(jobs, args.pages, args.workers, args.league, args.window)}
+        report['seconds'] = time.perf_counter() - t0
+    else:
+        report = {'jobs': renderBatch(jobs, args.workers, args.cache_dir, args.cache_size, args.profile, args.league)}
+        report['seconds'] = time.perf_counter() - t0
+        report['failed'] = sum([entry['status'] != 'ok' for entry in report['jobs']])
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
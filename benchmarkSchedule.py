@@ -0,0 +1,293 @@
+import argparse
+import ast
+import csv
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# =============================================================================
+# Time the schedule reformatting for a season, the startup imports, or a suite of synthetic seasons and layouts
+# =============================================================================
+
+parser = argparse.ArgumentParser(description='Time _reformatMLBSchedule on a season schedule, or run the benchmark suite')
+
+parser.add_argument('--fn', type=str, help='Schedule file, in the MLB .csv formatting', default='2026RoyalsSchedule.csv')
+parser.add_argument('--team', type=str, help='', default='Royals')
+parser.add_argument('--asg', type=str, help='All-Star Game date in dd/mm/yyyy format', default='14/07/2026')
+parser.add_argument('--start', type=int, help='Line of the schedule to start the regular season', default=0)
+parser.add_argument('--hour_format', type=str, help='', default='24')
+parser.add_argument('--repeats', type=int, help='Number of seasons to time', default=20)
+parser.add_argument('--script', type=str, help='Copy of displaySchedule.py to benchmark, e.g. an older revision for comparison. Default is the current displaySchedule.py.')
+parser.add_argument('--startup', action='store_true', help='Instead, compare the cold-start import time of the old top-level imports with the current startup path')
+parser.add_argument('--suite', action='store_true', help='Instead, time reformatting, drawing, and saving synthetic seasons (full, doubleheader-heavy, with spring training or a postseason, and every team) across layouts and formats')
+parser.add_argument('--render_repeats', type=int, help='Number of renders to time for each case of the suite', default=3)
+parser.add_argument('--results', type=str, help='JSON file for the suite results. Default prints them.')
+parser.add_argument('--baseline', type=str, help='Earlier suite results to compare against. Any stage slower than the baseline by more than the tolerance is a regression, and the exit status is 1.')
+parser.add_argument('--tolerance', type=float, help='Allowed slow-down relative to the baseline, as a fraction', default=0.2)
+
+# The imports displaySchedule.py used to make at the top of the script
+OLD_STARTUP = 'from astropy.io import ascii; from astropy.table import Table; import matplotlib.pyplot'
+# Importing the script, and what it then imports to draw and save a PDF
+NEW_STARTUP = 'import displaySchedule'
+NEW_RENDER = 'import displaySchedule; import matplotlib.figure; import matplotlib.collections; import matplotlib.backends.backend_pdf'
+
+def _importTime(statement):
+    # Total import time in ms of a fresh interpreter running the statement, from python -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Only the top-level imports, whose cumulative time already includes everything below them
+        if cumulative_us.strip().isdigit() and not name.startswith('  '):
+            total += int(cumulative_us)
+    return total / 1e3
+
+def _coldStart(statement, repeats):
+    # Best wall time in ms for a fresh interpreter to run the statement
+    timings = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        timings.append(time.perf_counter() - t0)
+    return min(timings) * 1e3
+
+def _isLiteral(node):
+    try:
+        ast.literal_eval(node)
+        return True
+    except ValueError:
+        return False
+
+def _loadFunctions(script):
+    # Older revisions of displaySchedule.py run as a script when imported, so only pull out its imports, functions, classes and literal constants
+    tree = ast.parse(open(script).read())
+    tree.body = [node for node in tree.body if type(node) in [ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef] or (type(node) == ast.Assign and _isLiteral(node.value))]
+    namespace = {}
+    exec(compile(tree, script, 'exec'), namespace)
+    return namespace
+
+# =============================================================================
+# Synthetic seasons in the MLB .csv formatting
+# =============================================================================
+
+MLB_COLUMNS = ['START DATE', 'START TIME', 'START TIME ET', 'SUBJECT', 'LOCATION', 'DESCRIPTION', 'END DATE', 'END DATE ET', 'END TIME', 'END TIME ET', 'REMINDER OFF', 'REMINDER ON', 'REMINDER DATE', 'REMINDER TIME', 'REMINDER TIME ET', 'SHOWTIMEAS FREE', 'SHOWTIMEAS BUSY']
+TEAMS = ['Astros', 'Mariners', 'Rangers', 'Angels', 'Athletics', 'Guardians', 'Twins', 'Royals', 'Tigers', 'White Sox', 'Yankees', 'Orioles', 'Red Sox', 'Rays', 'Blue Jays', 'Dodgers', 'Padres', 'Diamondbacks', 'Giants', 'Rockies', 'Brewers', 'Cardinals', 'Pirates', 'Reds', 'Cubs', 'Phillies', 'Braves', 'Mets', 'Nationals', 'Marlins']
+
+def _allStarDate(year):
+    # The second Tuesday of July
+    first = datetime.date(year, 7, 1)
+    return first + datetime.timedelta(days=(1 - first.weekday()) % 7 + 7)
+
+def _gameRow(date, start_minutes, away, home, suffix=''):
+    start = f'{(start_minutes//60 - 1) % 12 + 1:02d}:{start_minutes % 60:02d} {"PM" if start_minutes >= 720 else "AM"}'
+    end = f'{(start_minutes//60 + 2) % 12 + 1:02d}:{start_minutes % 60:02d} {"PM" if start_minutes + 180 >= 720 else "AM"}'
+    day = date.strftime('%m/%d/%y')
+    return [day, start, start, f'{away} at {home}{suffix}', f'{home} Park', '', day, day, end, end, 'FALSE', 'TRUE', day, start, start, 'FREE', 'BUSY']
+
+def syntheticSeason(team, year=2026, games=162, doubleheaders=0, spring_training=0, postseason=0, seed=0):
+    # Rows of a team's season in the MLB .csv formatting: spring training first, then the regular season in three-game series, then any postseason
+    # Returns the rows and the line the regular season starts on, for --start
+    rng = np.random.default_rng(seed)
+    opponents = [opponent for opponent in TEAMS if opponent != team]
+    rows = []
+    
+    # Spring training, every day up to a week before opening day
+    opening_day = datetime.date(year, 3, 26)
+    for i in range(spring_training):
+        date = opening_day - datetime.timedelta(days=spring_training + 7 - i)
+        opponent = opponents[rng.integers(len(opponents))]
+        rows.append(_gameRow(date, 13*60 + 5, *((team, opponent) if i % 2 else (opponent, team)), suffix=' - Spring Training'))
+    start = len(rows)
+    
+    # Game days are spread evenly over the season, apart from the All-Star break
+    asg = _allStarDate(year)
+    closing_day = datetime.date(year, 9, 27)
+    days = [opening_day + datetime.timedelta(days=i) for i in range((closing_day - opening_day).days + 1)]
+    days = [day for day in days if not -1 <= (day - asg).days <= 2]
+    game_days = [days[i] for i in np.linspace(0, len(days) - 1, games - doubleheaders).round().astype(int)]
+    doubleheader_days = set(rng.choice(len(game_days), doubleheaders, replace=False).tolist())
+    
+    for i, date in enumerate(game_days):
+        series = i // 3
+        opponent = opponents[(series * 7) % len(opponents)]
+        away, home = (team, opponent) if series % 2 else (opponent, team)
+        if i in doubleheader_days:
+            rows.append(_gameRow(date, 13*60 + 10, away, home))
+            rows.append(_gameRow(date, 18*60 + 40, away, home))
+        else:
+            rows.append(_gameRow(date, [13*60 + 10, 18*60 + 40, 19*60 + 10][rng.integers(3)], away, home))
+    
+    # The postseason, every day from October
+    for i in range(postseason):
+        opponent = opponents[i // 5 % len(opponents)]
+        rows.append(_gameRow(datetime.date(year, 10, 1) + datetime.timedelta(days=i), 19*60 + 8, *((team, opponent) if i % 2 else (opponent, team)), suffix=' - Postseason'))
+    
+    return rows, start
+
+def syntheticLeague(year=2026, games=162, spring_training=0, seed=0):
+    # Rows of a whole league's season, every team playing every day of a series with a new pairing each series, 2430 games in all
+    rng = np.random.default_rng(seed)
+    rows = []
+    opening_day = datetime.date(year, 3, 26)
+    for i in range(spring_training):
+        date = opening_day - datetime.timedelta(days=spring_training + 7 - i)
+        pairs = rng.permutation(len(TEAMS)).reshape(-1, 2)
+        rows.extend([_gameRow(date, 13*60 + 5, TEAMS[away], TEAMS[home], suffix=' - Spring Training') for away, home in pairs])
+    
+    asg = _allStarDate(year)
+    closing_day = datetime.date(year, 9, 27)
+    days = [opening_day + datetime.timedelta(days=i) for i in range((closing_day - opening_day).days + 1)]
+    days = [day for day in days if not -1 <= (day - asg).days <= 2]
+    for i, date in enumerate([days[i] for i in np.linspace(0, len(days) - 1, games).round().astype(int)]):
+        if i % 3 == 0:
+            pairs = rng.permutation(len(TEAMS)).reshape(-1, 2)
+        rows.extend([_gameRow(date, 19*60 + 5, TEAMS[away], TEAMS[home]) for away, home in pairs])
+    return rows
+
+def writeSeason(fn, rows):
+    with open(fn, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MLB_COLUMNS)
+        writer.writerows(rows)
+    return fn
+
+# =============================================================================
+# Benchmark suite
+# =============================================================================
+
+# Season cases, keyword arguments for syntheticSeason. The postseason runs past September, off the calendar, so it is only reformatted.
+SEASONS = {'season': {}, 'doubleheaders': {'doubleheaders': 30}, 'spring_training': {'spring_training': 32}, 'postseason': {'postseason': 15}}
+# Layouts, as parameter overrides. The full season is drawn in each, and the other seasons in the first.
+LAYOUTS = {'3x2 letter': {'rows': 3, 'columns': 2, 'fw': 8.5, 'fh': 11.0}, '2x3 landscape': {'rows': 2, 'columns': 3, 'fw': 11.0, 'fh': 8.5}, '3x2 tabloid': {'rows': 3, 'columns': 2, 'fw': 11.0, 'fh': 17.0}, '3x2 half letter': {'rows': 3, 'columns': 2, 'fw': 5.5, 'fh': 8.5}}
+FORMATS = ['pdf', 'png', 'svg']
+
+def _summarise(timings):
+    timings = sorted(timings)
+    return {'best_ms': timings[0]*1e3, 'median_ms': timings[len(timings)//2]*1e3, 'repeats': len(timings)}
+
+def _timeReformat(displaySchedule, fn, team, start, asg, repeats):
+    displaySchedule._reformatMLBSchedule(fn, team, asg, start, '24', False)
+    timings = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        displaySchedule._reformatMLBSchedule(fn, team, asg, start, '24', False)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+def _timeRender(displaySchedule, p, repeats):
+    # {stage: timings} for drawing the team's artists (the calendar loop), the bounding box, and saving each format
+    from scheduleProfile import StageProfiler
+    displaySchedule.renderFormats(p, FORMATS, highlights=[]) # Builds the layout's template, which is shared after that
+    timings = {}
+    for i in range(repeats):
+        profiler = StageProfiler()
+        displaySchedule.renderFormats(p, FORMATS, highlights=[], profiler=profiler)
+        for record in profiler.stages:
+            if record['stage'] in ['artists', 'bbox'] or record['stage'].startswith('savefig'):
+                timings.setdefault(record['stage'], []).append(record['seconds'])
+    return timings
+
+def runSuite(repeats=20, render_repeats=3, year=2026, team='Royals'):
+    # Returns {'environment': ..., 'results': {'season/layout/stage': {'best_ms', 'median_ms', 'repeats'}}}
+    import displaySchedule
+    import matplotlib
+    
+    results = {}
+    asg = _allStarDate(year).strftime('%d/%m/%Y')
+    with tempfile.TemporaryDirectory() as directory:
+        for season, kwargs in SEASONS.items():
+            rows, start = syntheticSeason(team, year, **kwargs)
+            fn = writeSeason(os.path.join(directory, f'{season}.csv'), rows)
+            results[f'{season}/-/reformat'] = _summarise(_timeReformat(displaySchedule, fn, team, start, asg, repeats))
+            
+            if kwargs.get('postseason'):
+                continue
+            for layout, overrides in LAYOUTS.items():
+                if season != 'season' and layout != list(LAYOUTS)[0]:
+                    continue
+                p = displaySchedule.ScheduleConfig(str(year), team, overrides=dict(overrides, fn=fn, start=start, asg=asg, asg_fill='xkcd:red', asg_font='xkcd:white', asg_location='PHI'))
+                for stage, timings in _timeRender(displaySchedule, p, render_repeats).items():
+                    results[f'{season}/{layout}/{stage}'] = _summarise(timings)
+        
+        # Every team's season, reformatted one after another, as in a league-wide batch
+        fns = [writeSeason(os.path.join(directory, f'league_{i}.csv'), syntheticSeason(league_team, year, seed=i)[0]) for i, league_team in enumerate(TEAMS)]
+        timings = []
+        for i in range(max(repeats // 5, 1)):
+            t0 = time.perf_counter()
+            for fn, league_team in zip(fns, TEAMS):
+                displaySchedule._reformatMLBSchedule(fn, league_team, asg, 0, '24', False)
+            timings.append(time.perf_counter() - t0)
+        results[f'league ({len(TEAMS)} teams)/-/reformat'] = _summarise(timings)
+        
+        # The same from one league-wide file, streamed once for all the teams
+        fn = writeSeason(os.path.join(directory, 'league.csv'), syntheticLeague(year, spring_training=32))
+        timings = []
+        for i in range(max(repeats // 5, 1)):
+            t0 = time.perf_counter()
+            for league_team, games in displaySchedule.streamLeagueSchedule(fn):
+                displaySchedule._reformatMLBSchedule(fn, league_team, asg, None, '24', False, games=games)
+            timings.append(time.perf_counter() - t0)
+        results[f'league ({len(TEAMS)} teams)/-/stream and reformat'] = _summarise(timings)
+    
+    environment = {'python': platform.python_version(), 'numpy': np.__version__, 'matplotlib': matplotlib.__version__, 'machine': platform.machine(), 'date': datetime.date.today().isoformat()}
+    return {'environment': environment, 'results': results}
+
+def compareResults(results, baseline, tolerance=0.2):
+    # Rows of (name, baseline ms, ms, ratio, regression) for every result in both, comparing the best times
+    comparison = []
+    for name, result in results['results'].items():
+        if name in baseline['results']:
+            ratio = result['best_ms'] / baseline['results'][name]['best_ms']
+            comparison.append((name, baseline['results'][name]['best_ms'], result['best_ms'], ratio, ratio > 1 + tolerance))
+    return comparison
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    
+    if args.suite:
+        results = runSuite(args.repeats, args.render_repeats)
+        if args.results:
+            with open(args.results, 'w') as f:
+                json.dump(results, f, indent=4)
+        else:
+            print(json.dumps(results, indent=4))
+        
+        if args.baseline:
+            comparison = compareResults(results, json.load(open(args.baseline)), args.tolerance)
+            for name, baseline_ms, ms, ratio, regression in comparison:
+                print(f'{name}: {baseline_ms:.2f} -> {ms:.2f} ms ({ratio:.2f}x){"  REGRESSION" if regression else ""}')
+            sys.exit(int(any([row[4] for row in comparison])))
+        sys.exit()
+
+    if args.startup:
+        for label, statement in [('before (astropy + pyplot)', OLD_STARTUP), ('after (startup)', NEW_STARTUP), ('after (startup + PDF render imports)', NEW_RENDER)]:
+            print(f'{label}: imports {_importTime(statement):.1f} ms, cold start {_coldStart(statement, min(args.repeats, 5)):.1f} ms')
+        sys.exit()
+
+    if args.script is None:
+        import displaySchedule
+        _reformatMLBSchedule = displaySchedule._reformatMLBSchedule
+    else:
+        _reformatMLBSchedule = _loadFunctions(args.script)['_reformatMLBSchedule']
+    highlights = ['30/03/2026', '04/04/2026', '01/07/2026']
+
+    # The first call pays for any lazy imports
+    _reformatMLBSchedule(args.fn, args.team, args.asg, args.start, args.hour_format, False, highlights=highlights)
+
+    timings = []
+    for i in range(args.repeats):
+        t0 = time.perf_counter()
+        _reformatMLBSchedule(args.fn, args.team, args.asg, args.start, args.hour_format, False, highlights=highlights)
+        timings.append(time.perf_counter() - t0)
+
+    timings.sort()
+    print(f'{args.script or "displaySchedule.py"}: {args.repeats} seasons, best {timings[0]*1e3:.2f} ms, median {timings[len(timings)//2]*1e3:.2f} ms per season')
@@ -1,9 +1,18 @@
 import argparse
-from astropy.io import ascii
-from astropy.table import Table
+import contextlib
+import csv
 import datetime
+import functools
+import hashlib
+import io
 import json
-import matplotlib.pyplot as plt 
+import os
+import threading
+import uuid
+import numpy as np
+
+from scheduleCache import RenderCache, hashFile, hashParameters
+from scheduleProfile import StageProfiler, profileStage
 
 # =============================================================================
 # USER VARIABLES
@@ -16,10 +25,12 @@ parser = argparse.ArgumentParser(description='Parse user inputs, sometimes overw
 parser.add_argument('--year', type=str, help='', required=True)
 parser.add_argument('--team', type=str, help='', required=True)
 
-parser.add_argument('--fn', type=str, help='Schedule file. Currently must be a .csv with the MLB formatting', required=False)
+parser.add_argument('--fn', type=str, help='Schedule file. Currently must be a .csv with the MLB formatting, either one team\'s or the whole league\'s', required=False)
 parser.add_argument('--config_file', type=str, help='JSON file with variables')
 
-parser.add_argument('--start', type=int, help='Line of the schedule to start the regular season. Default is 33, from the current MLB test schedules.') # default=33)
+parser.add_argument('--reader', type=str, choices=['csv', 'astropy'], help='How to read the schedule file. Default is the stdlib csv module, astropy is only imported if asked for.')
+
+parser.add_argument('--start', type=int, help='Line of the schedule to start the regular season. Default is to skip any spring training and exhibition games, found by their SUBJECT or DESCRIPTION.') # default=33)
 
 parser.add_argument('--hfc', type=str, help='Home Fill Colour') # 
 parser.add_argument('--htc', type=str, help='Home Text Colour') # 
@@ -38,7 +49,7 @@ parser.add_argument('--asg_font', type=str, help='ASG fill colour') #
 parser.add_argument('--asg_location', type=str, help='')
 
 parser.add_argument('--tbc', type=str, help='Ticket Box Colour') # 
-parser.add_argument('--highlight_file', type=str, help='')
+parser.add_argument('--highlight_file', type=str, help='Days to highlight, one per line: dd/mm/yyyy dates, dd/mm/yyyy - dd/mm/yyyy ranges, or rules such as "weekday=Friday; location=home" or "opponent=Cubs"')
 
 parser.add_argument('--weekstart', type=int, help='Week starts on Sunday = 6, Monday = 0') # 
 
@@ -66,6 +77,7 @@ parser.add_argument('--dfs', type=float, help='Date font size')
 parser.add_argument('--mfs', type=float, help='Month font size')
 
 parser.add_argument('--hfs', type=float, help='Header font size')
+parser.add_argument('--autofit', action='store_const', const=True, help='Choose the largest game, date, and month font sizes at which every label of the schedule fits its cell, and shrink the header font to fit the width if need be. Font sizes given explicitly are kept.')
 
 parser.add_argument('--header_add', type=float, help='Added space above the calendar section for the cells')
 
@@ -94,186 +106,565 @@ parser.add_argument('--legend_x_shift', type=float, help='Move legend left or ri
 
 parser.add_argument('--frame_on', type=float, help='Show the frame of the desired figure size, with units. This is helpful for fine-tuning sizes.')
 parser.add_argument('--abbvs', type=str, help='JSON file with the three letter abbreviations for the nicknames in the MLB schedule.')
-
-# Parse arguments
-args = parser.parse_args()
-
-config = {}
-if args.config_file:
-    try:
-        with open(args.config_file, "r") as f:
-            config = json.load(f)
-    except Exception as e:
-        print(f"Error reading JSON file: {e}")
-
-# Resolve command line versus JSON
-year = args.year # if args.year is not None else config.get('year', '') # Making these required
-team = args.team # if args.team is not None else config.get('team', '')
-
-fn = args.fn if args.fn is not None else config.get('fn', f'{year}{team}Schedule.csv')
-start = args.start if args.start is not None else config.get('start', 0)
-
-asg = args.asg if args.asg is not None else config.get('asg', '01/01/2001')
-asg_fill = args.asg_fill if args.asg_fill is not None else config.get('asg_fill', '') # ASG font colour
-asg_font = args.asg_font if args.asg_font is not None else config.get('asg_font', '') # ASG fill colour
-asg_location = args.asg_location if args.asg_location is not None else config.get('asg_location', '')
-
-hfc = args.hfc if args.hfc is not None else config.get('hfc', 'xkcd:royal blue') # Home Fill Colour
-htc = args.htc if args.htc is not None else config.get('htc', 'xkcd:white') # Home Text Colour
-
-afc = args.afc if args.afc is not None else config.get('afc', 'xkcd:sky blue') # Away Fill Colour
-atc = args.atc if args.atc is not None else config.get('atc', 'xkcd:white') # Away Text Colour
-
-ofc = args.ofc if args.ofc is not None else config.get('ofc', 'xkcd:light grey') # Off Day Fill Colour
-otc = args.otc if args.otc is not None else config.get('otc', 'xkcd:navy blue') # Off Day Text Colour
-
-head_colour = args.head_colour if args.head_colour is not None else config.get('head_colour', 'xkcd:navy blue') # Off Day Text Colour
-
-tbc = args.tbc if args.tbc is not None else config.get('tbc', 'xkcd:goldenrod') # Ticket Box Colour
-highlight_file = args.highlight_file if args.highlight_file is not None else config.get('highlight_file')#, '2025_tickets.txt')
-
-abbvs = args.abbvs if args.abbvs is not None else config.get('abbvs', 'nickname_to_abbreviation_traditional.json')
-
-weekstart = args.weekstart if args.weekstart is not None else config.get('weekstart', 0) # Week starts on Sunday = 6, Monday = 0
-
-legend_month = args.legend_month if args.legend_month is not None else config.get('legend_month', 7) # IE, the legend goes under this month
-legend_scale = args.legend_scale if args.legend_scale is not None else config.get('legend_scale', 0.75) # Scale of the legend relative to calendar cells
-
-hour_format = args.hour_format if args.hour_format is not None else config.get('hour_format', '24') # '12' or '24' Defaults to '24' if neither of these.
-ampm = args.ampm if args.ampm is not None else config.get('ampm', False)
-
-fh = args.fh if args.fh is not None else config.get('fh', 11.0) # Ideal figure height
-fw = args.fw if args.fw is not None else config.get('fw', 8.5) # Ideal figure width
-rows = args.rows if args.rows is not None else config.get('rows', 3)
-columns = args.columns if args.columns is not None else config.get('columns', 2)
-
-unit_scale = args.unit_scale if args.unit_scale is not None else config.get('unit_scale', 1.25)
-
-v_margin = args.v_margin if args.v_margin is not None else config.get('v_margin', 0.1)
-h_margin = args.h_margin if args.h_margin is not None else config.get('h_margin', 0.1)
-
-# Fine-tuning parameters to make it actually look good
-
-cell_width = args.cell_width if args.cell_width is not None else config.get('cell_width', (fw - 2*h_margin) / (7*columns + 0.5*(columns-1))) # Each month is seven days wide, plus half a day's width between the months
-cell_height = args.cell_height if args.cell_height is not None else config.get('cell_height', (cell_width * 2) / 2.5)
-
-gfs = args.gfs if args.gfs is not None else config.get('gfs', cell_height*25) # Game font size
-dfs = args.dfs if args.dfs is not None else config.get('dfs', 0.5*gfs) # Date font size
-mfs = args.mfs if args.mfs is not None else config.get('mfs', 2*gfs) # Month font size
-
-hfs = args.hfs if args.hfs is not None else config.get('hfs', min([fw*3, fh*4])) # Header font size
-
-header_add = args.header_add if args.header_add is not None else config.get('header_add', v_margin + hfs/72)
-
-spare_height = fh - v_margin*2 - hfs/72 - (cell_height * (rows*6)) # Six weeks to a month, plus 1.5 between each row. It simplifies to r*7 - 1 = 6r + 1.5*(r-1)
-
-month_add = args.month_add if args.month_add is not None else config.get('month_add', spare_height*0.4)
-
-frame_on = args.frame_on if args.frame_on is not None else config.get('frame_on', False)
-
-m4x = args.m4x if args.m4x is not None else config.get('m4x', 0)
-m4y = args.m4y if args.m4y is not None else config.get('m4y', 0)
-
-m5x = args.m5x if args.m5x is not None else config.get('m5x', 0)
-m5y = args.m5y if args.m5y is not None else config.get('m5y', 0)
-
-m6x = args.m6x if args.m6x is not None else config.get('m6x', 0)
-m6y = args.m6y if args.m6y is not None else config.get('m6y', 0)
-
-m7x = args.m7x if args.m7x is not None else config.get('m7x', 0)
-m7y = args.m7y if args.m7y is not None else config.get('m7y', 0)
-
-m8x = args.m8x if args.m8x is not None else config.get('m8x', 0)
-m8y = args.m8y if args.m8y is not None else config.get('m8y', 0)
-
-m9x = args.m9x if args.m9x is not None else config.get('m9x', 0)
-m9y = args.m9y if args.m9y is not None else config.get('m9y', 0)
-
-legend_add = args.legend_add if args.legend_add is not None else config.get('legend_add', 0)
-legend_x_shift = args.legend_x_shift if args.legend_x_shift is not None else config.get('legend_x_shift', 0)
+parser.add_argument('--cache_dir', type=str, help='Directory for the render cache. An unchanged run is copied from the cache, and the parsed schedule is reused when only the config or highlights change. A PNG at the figure dpi only redraws the months whose cells or position changed. Default is no cache.')
+parser.add_argument('--cache_size', type=float, default=100, help='Maximum size of the render cache in MB, the least recently used entries are removed first')
+parser.add_argument('--output', type=str, help='Output file. Default is {year}_{team}_Schedule.pdf, and the format follows the extension.')
+parser.add_argument('--formats', type=str, nargs='+', help='Save each of these formats (e.g. pdf png svg) next to the output, all from one drawing of the figure')
+parser.add_argument('--dpi', type=float, help='Resolution of raster formats. Default is the figure\'s, 100.')
+parser.add_argument('--profile', type=str, nargs='?', const='-', help='Write the wall time and memory allocations of each stage, the number of artists, and the output sizes as JSON to this file, or print them if no file is given')
+parser.add_argument('--trace_memory', action='store_true', help='With --profile, also record the peak memory of each stage with tracemalloc. This slows every stage down, so the times are less representative.')
+
+def _readConfig(config_file):
+    config = {}
+    if config_file:
+        try:
+            with open(config_file, "r") as f:
+                config = json.load(f)
+        except Exception as e:
+            print(f"Error reading JSON file: {e}")
+    return config
+
+# The month offsets, m4x ... m9y, are rows of ScheduleConfig.month_offsets, from March/April to September
+OFFSET_MONTHS = [4, 5, 6, 7, 8, 9]
+
+class ScheduleConfig:
+    # Every parameter of a schedule, resolved in one step from overrides (e.g. the command line), a JSON config, and the defaults,
+    # in that order of precedence. Read a parameter as p.gfs or p['gfs'].
+    # A config can't be changed once made, so one can be shared by any number of threads, and pickled to worker processes.
+    # The derived sizes (DERIVED) are only worked out when first read, unless they were given.
+    # The month offsets are one read-only array, month_offsets, of (x, y) in cell units for each of OFFSET_MONTHS.
+    # They can still be given one at a time as m4x ... m9y, which take precedence over a month_offsets from the same source.
+    
+    DEFAULTS = {
+        'start': None, # None finds the regular season by itself
+        'asg': '01/01/2001',
+        'asg_fill': '', # ASG fill colour
+        'asg_font': '', # ASG font colour
+        'asg_location': '',
+        'hfc': 'xkcd:royal blue', # Home Fill Colour
+        'htc': 'xkcd:white', # Home Text Colour
+        'afc': 'xkcd:sky blue', # Away Fill Colour
+        'atc': 'xkcd:white', # Away Text Colour
+        'ofc': 'xkcd:light grey', # Off Day Fill Colour
+        'otc': 'xkcd:navy blue', # Off Day Text Colour
+        'head_colour': 'xkcd:navy blue', # Header Text Colour
+        'tbc': 'xkcd:goldenrod', # Ticket Box Colour
+        'highlight_file': None, # e.g. '2025_tickets.txt'
+        'abbvs': 'nickname_to_abbreviation_traditional.json',
+        'reader': 'csv',
+        'weekstart': 0, # Week starts on Sunday = 6, Monday = 0
+        'legend_month': 7, # IE, the legend goes under this month
+        'legend_scale': 0.75, # Scale of the legend relative to calendar cells
+        'hour_format': '24', # '12' or '24' Defaults to '24' if neither of these.
+        'ampm': False,
+        'fh': 11.0, # Ideal figure height
+        'fw': 8.5, # Ideal figure width
+        'rows': 3,
+        'columns': 2,
+        'unit_scale': 1.25,
+        'v_margin': 0.1,
+        'h_margin': 0.1,
+        'autofit': False,
+        # Fine-tuning parameters to make it actually look good
+        'frame_on': False,
+        'legend_add': 0,
+        'legend_x_shift': 0,
+    }
+    DERIVED = ['cell_width', 'cell_height', 'gfs', 'dfs', 'mfs', 'hfs', 'header_add', 'month_add']
+    NAMES = frozenset(['year', 'team', 'fn'] + list(DEFAULTS) + DERIVED + ['month_offsets']) # For p[name], which is on the per-day drawing path
+    
+    __slots__ = ['year', 'team', 'fn', 'month_offsets'] + list(DEFAULTS) + ['_given', '_derived', '_digest']
+    
+    def __init__(self, year, team, config=None, overrides=None):
+        config = config if config is not None else {}
+        overrides = overrides if overrides is not None else {}
+        
+        def get(name, default=None):
+            if overrides.get(name) is not None:
+                return overrides[name]
+            return config.get(name, default)
+        
+        # Resolve command line versus JSON
+        values = {'year': year, 'team': team, 'fn': get('fn', f'{year}{team}Schedule.csv')}
+        values.update({name: get(name, default) for name, default in self.DEFAULTS.items()})
+        
+        month_offsets = np.zeros((len(OFFSET_MONTHS), 2))
+        for source in [config, overrides]:
+            if source.get('month_offsets') is not None:
+                month_offsets[:] = source['month_offsets']
+            for i, month in enumerate(OFFSET_MONTHS):
+                for j, axis in enumerate('xy'):
+                    if source.get(f'm{month}{axis}') is not None:
+                        month_offsets[i, j] = source[f'm{month}{axis}']
+        month_offsets.flags.writeable = False
+        values['month_offsets'] = month_offsets
+        
+        values['_given'] = {name: get(name) for name in self.DERIVED if get(name) is not None}
+        values['_derived'] = {}
+        values['_digest'] = None
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f'ScheduleConfig is frozen, make a new one to change {name}')
+    
+    def __getattr__(self, name):
+        # Only called for names that aren't slots, i.e. the derived sizes
+        if name not in self.DERIVED:
+            raise AttributeError(name)
+        if name not in self._derived:
+            self._derived[name] = self._given[name] if name in self._given else self._derive(name)
+        return self._derived[name]
+    
+    def _derive(self, name):
+        # Each derived size reads the ones it depends on, so they are worked out in whatever order they are needed
+        if name == 'cell_width':
+            return (self.fw - 2*self.h_margin) / (7*self.columns + 0.5*(self.columns-1)) # Each month is seven days wide, plus half a day's width between the months
+        if name == 'cell_height':
+            return (self.cell_width * 2) / 2.5
+        if name == 'gfs':
+            return self.cell_height*25 # Game font size
+        if name == 'dfs':
+            return 0.5*self.gfs # Date font size
+        if name == 'mfs':
+            return 2*self.gfs # Month font size
+        if name == 'hfs':
+            return min([self.fw*3, self.fh*4]) # Header font size
+        if name == 'header_add':
+            return self.v_margin + self.hfs/72
+        if name == 'month_add':
+            spare_height = self.fh - self.v_margin*2 - self.hfs/72 - (self.cell_height * (self.rows*6)) # Six weeks to a month, plus 1.5 between each row. It simplifies to r*7 - 1 = 6r + 1.5*(r-1)
+            return spare_height*0.4
+    
+    def withSizes(self, sizes):
+        # A copy with these derived sizes (e.g. from _fitFontSizes) in place of the defaults, keeping any given explicitly
+        # The sizes that depend on them, like header_add on hfs, are worked out again from the new ones
+        copy = object.__new__(ScheduleConfig)
+        copy.__setstate__(dict(self.__getstate__(), _given=dict(sizes, **self._given), _derived={}, _digest=None))
+        return copy
+    
+    def __getitem__(self, name):
+        if name not in self.NAMES:
+            raise KeyError(name)
+        return getattr(self, name)
+    
+    @classmethod
+    def names(cls):
+        return ['year', 'team', 'fn'] + list(cls.DEFAULTS) + cls.DERIVED + ['month_offsets']
+    
+    def toDict(self, names=None, exclude=()):
+        # JSON-able values of the named parameters, or all of them, with month_offsets as a list of [x, y]
+        return {name: self[name].tolist() if name == 'month_offsets' else self[name] for name in (names or self.names()) if name not in exclude}
+    
+    def digest(self, exclude=()):
+        # A stable hash of what the config was made from, for caching, without working out the derived sizes
+        if exclude:
+            return self._hash(exclude)
+        if self._digest is None:
+            object.__setattr__(self, '_digest', self._hash())
+        return self._digest
+    
+    def _hash(self, exclude=()):
+        inputs = self.toDict([name for name in self.names() if name not in self.DERIVED], exclude)
+        return hashParameters('config', inputs, {name: value for name, value in self._given.items() if name not in exclude})
+    
+    def __hash__(self):
+        return int(self.digest()[:16], 16)
+    
+    def __eq__(self, other):
+        return isinstance(other, ScheduleConfig) and self.digest() == other.digest()
+    
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+    
+    def __repr__(self):
+        return f'ScheduleConfig({self.year!r}, {self.team!r})'
+
+@functools.lru_cache(maxsize=None)
+def _measuringRenderer():
+    # At 72 dpi, so extents come out in points
+    from matplotlib.backends.backend_agg import RendererAgg
+    return RendererAgg(1, 1, 72)
+
+@functools.lru_cache(maxsize=4096)
+def _textExtent(s, weight='normal', size=10.0):
+    # Width and height in points of a string in the default font, measured once per (string, weight, size)
+    from matplotlib.font_manager import FontProperties
+    width, height, descent = _measuringRenderer().get_text_width_height_descent(s, FontProperties(size=size, weight=weight), ismath=False)
+    return width, height
+
+# Space kept clear around the text of a cell, as a fraction of the cell
+AUTOFIT_PADDING = 0.05
+
+# Size of a doubleheader's two start times, relative to a single one
+DOUBLEHEADER_SCALE = 0.8
+
+def _fitFontSizes(p, ascii_sched):
+    # The largest gfs, dfs, and mfs at which every label of the reformatted schedule fits, for the cell size in p, and the default hfs,
+    # or smaller if the title doesn't fit across the page. Text extents scale with the font size, so every label is measured
+    # once at 10 pt and scaled, in a single pass, rather than rendering the schedule to see what overflows.
+    # The positions are those of _dayCells: the date in the top left corner, 0.1 of a cell down, the opponent in the middle,
+    # and the start time (or ASG location) 0.2 of a cell up from the bottom
+    nickname_to_abbreviation_dict = _loadAbbreviations(p['abbvs'])
+    played = np.isin(ascii_sched['location'], ['H', 'A'])
+    opponents = {nickname_to_abbreviation_dict[opponent] for opponent in ascii_sched['opponent'][played].tolist()} | {'ASG'}
+    start_times = set(ascii_sched['start_time'][played].tolist()) - {'00:00'}
+    times = {time for time in start_times if '\n' not in time} | {p['asg_location'].upper(), '00:00'}
+    # A doubleheader's times are two lines at DOUBLEHEADER_SCALE, with no extra space between them
+    doubleheader_times = {line for time in start_times if '\n' in time for line in time.split('\n')}
+    dates = {str(day) for day in range(1, 32)}
+    headers = {weekdays[day].upper() for day in weekdays}
+    
+    # Figure units to points. The axes only take up the default subplot's share of the figure, and keep an equal aspect.
+    from matplotlib import rcParams
+    points = p['unit_scale']*72*min([rcParams['figure.subplot.right'] - rcParams['figure.subplot.left'], rcParams['figure.subplot.top'] - rcParams['figure.subplot.bottom']])
+    width, height = p['cell_width']*points, p['cell_height']*points
+    padding = AUTOFIT_PADDING*height
+    
+    def extents(labels, weight):
+        # The widest and tallest of the labels at 10 pt
+        sizes = np.array([_textExtent(s, weight) for s in labels if s != ''])
+        return sizes[:, 0].max(), sizes[:, 1].max()
+    
+    time_width, time_height = extents(times, 'bold')
+    if doubleheader_times:
+        doubleheader_width, doubleheader_height = extents(doubleheader_times, 'bold')
+        time_width, time_height = max([time_width, DOUBLEHEADER_SCALE*doubleheader_width]), max([time_height, 2*DOUBLEHEADER_SCALE*doubleheader_height])
+    date_width, date_height = extents(dates, 'normal')
+    header_width, header_height = extents(headers, 'normal')
+    opponent_width, opponent_height = extents(opponents, 'bold')
+    month_width, month_height = extents([months[month].upper() for month in months], 'bold')
+    title_width, title_height = extents([f'{p["year"]} {p["team"]} Schedule'.upper()], 'bold')
+    
+    fitted = {}
+    # Start times across the cell, and inside it below their centre. Weekday headers across the cell. Dates in the top left corner.
+    fitted['dfs'] = 10*min([(1 - 2*AUTOFIT_PADDING)*width / time_width, 2*(0.2*height - padding) / time_height, (1 - 2*AUTOFIT_PADDING)*width / header_width, (0.5 - AUTOFIT_PADDING - 0.06)*width / date_width])
+    # The opponent across the cell, and clear of the start time below and the date above
+    time_height, date_height, header_height = [extent*fitted['dfs']/10 for extent in [time_height, date_height, header_height]]
+    fitted['gfs'] = 10*min([(1 - 2*AUTOFIT_PADDING)*width / opponent_width, 2*min([0.3*height - time_height/2, 0.4*height - date_height]) / opponent_height])
+    # The month across its seven days, and above the weekday headers
+    fitted['mfs'] = 10*min([7*(1 - 2*AUTOFIT_PADDING)*width / month_width, 2*(0.75*height - header_height/2 - padding) / month_height])
+    # The title across the page, but no larger than the default
+    fitted['hfs'] = min([10*(p['fw'] - 2*p['h_margin'])*points / title_width, p['fw']*3, p['fh']*4])
+    # Rounded down, so the sizes are stable and still fit
+    return {name: float(np.floor(size*10)/10) for name, size in fitted.items()}
 
 # =============================================================================
 # Read in and format text file
 # =============================================================================
 
-if type(highlight_file) == str and highlight_file != '':
-    try:
-        highlights = open(highlight_file).readlines()
-        for i in range(len(highlights)):
-            highlights[i] = highlights[i][:-1]
-    except OSError:
-        highlights = None
-        print('Highlight file not found, ignoring.')
-else:
-    highlights = None
-    
-def _reformatMLBSchedule(fn, team, asg, start, hour_format, ampm, highlights=None):
-    if ampm == True:
-        ampm_format = ' %p'
+class HighlightIndex:
+    # The days to highlight (e.g. a ticket plan), as a set of ordinal dates plus rules that pick out days by what is on them
+    # dates are dd/mm/yyyy strings, datetime.dates, or ordinals, and ranges are (first, last) pairs of the same, inclusive
+    # Each rule is a dict of any of weekday (names or numbers, Monday = 0), location ('H'/'home' or 'A'/'away'), and opponent (nicknames),
+    # and picks out the days that match all of them, e.g. {'weekday': 'Friday', 'location': 'home'} for every Friday home game
+    # An index never changes once made, so one can be shared by every render of a batch
+    # Anything that can't be read as a date or a rule raises a ValueError
+    
+    RULE_KEYS = ['weekday', 'location', 'opponent']
+    
+    def __init__(self, dates=(), ranges=(), rules=()):
+        ordinals = {self._ordinal(date) for date in dates}
+        for first, last in ranges:
+            ordinals.update(range(self._ordinal(first), self._ordinal(last) + 1))
+        self.ordinals = frozenset(ordinals)
+        self.rules = tuple([self._rule(**rule) for rule in rules])
+    
+    @staticmethod
+    def _ordinal(date):
+        if type(date) == str:
+            return datetime.datetime.strptime(date.strip(), '%d/%m/%Y').toordinal()
+        if isinstance(date, datetime.date):
+            return date.toordinal()
+        return int(date)
+    
+    @classmethod
+    def _rule(cls, weekday=None, location=None, opponent=None, **unknown):
+        # (weekdays, location, opponents), with None for anything the rule doesn't restrict
+        if unknown:
+            raise ValueError(f'Unknown rule key {", ".join(unknown)}, expected any of {", ".join(cls.RULE_KEYS)}')
+        names = {name.lower(): day for day, name in weekdays.items()}
+        if weekday is not None:
+            days = [weekday] if type(weekday) in [str, int] else weekday
+            unknown_days = [day for day in days if type(day) == str and day.strip().lower() not in names]
+            if unknown_days:
+                raise ValueError(f'Unknown weekday {unknown_days[0].strip()}')
+            weekday = frozenset([names[day.strip().lower()] if type(day) == str else int(day) for day in days])
+        if location is not None:
+            locations = {'h': 'H', 'home': 'H', 'a': 'A', 'away': 'A'}
+            if location.strip().lower() not in locations:
+                raise ValueError(f'Unknown location {location.strip()}, expected home or away')
+            location = locations[location.strip().lower()]
+        if opponent is not None:
+            opponent = frozenset([name.strip() for name in ([opponent] if type(opponent) == str else opponent)])
+        return (weekday, location, opponent)
+    
+    def __len__(self):
+        return len(self.ordinals) + len(self.rules)
+    
+    def mask(self, ordinals, opponents, locations):
+        # Whether each day, with the game on it, is highlighted: a date given explicitly or in a range, or a day that matches any rule
+        ordinals = np.asarray(ordinals)
+        highlight = np.isin(ordinals, np.fromiter(self.ordinals, dtype=int, count=len(self.ordinals)))
+        for days, home_away, opponents_ in self.rules:
+            match = np.ones(len(ordinals), dtype=bool)
+            if days is not None:
+                match &= np.isin((ordinals - 1) % 7, list(days)) # Ordinal 1 is a Monday
+            if home_away is not None:
+                match &= np.asarray(locations) == home_away
+            if opponents_ is not None:
+                match &= np.isin(opponents, list(opponents_))
+            highlight |= match
+        return highlight
+    
+    def key(self):
+        # A JSON-able summary for cache keys, the same for the same days and rules however they were given
+        return {'dates': sorted(self.ordinals), 'rules': sorted([[sorted(days) if days is not None else None, home_away, sorted(opponents) if opponents is not None else None] for days, home_away, opponents in self.rules], key=json.dumps)}
+    
+    @classmethod
+    def fromLines(cls, lines):
+        # One entry per line: a date (dd/mm/yyyy), a range (dd/mm/yyyy - dd/mm/yyyy), or a rule of name=value pairs separated by ';',
+        # e.g. "weekday=Friday,Saturday; location=home" or "opponent=Cubs,White Sox". Blank lines and anything after a # are ignored.
+        # Each line is checked as it is read, so a ValueError names the line that couldn't be read
+        dates, ranges, rules = [], [], []
+        for number, line in enumerate(lines, 1):
+            line = line.split('#')[0].strip()
+            if line == '':
+                continue
+            try:
+                if '=' in line:
+                    rule = {}
+                    for pair in line.split(';'):
+                        name, _, value = pair.partition('=')
+                        rule[name.strip()] = value.split(',') if name.strip() != 'location' else value
+                    cls._rule(**rule)
+                    rules.append(rule)
+                elif ' - ' in line:
+                    first, last = line.split(' - ')
+                    ranges.append((cls._ordinal(first), cls._ordinal(last)))
+                else:
+                    dates.append(cls._ordinal(line))
+            except ValueError as e:
+                raise ValueError(f'Line {number} ({line}): {e}') from None
+        return cls(dates, ranges, rules)
+
+def _highlightIndex(highlights):
+    # A HighlightIndex from one, a list of dd/mm/yyyy dates, or a dict of HighlightIndex arguments (e.g. from JSON), or None for no highlights
+    if highlights is None or isinstance(highlights, HighlightIndex):
+        return highlights
+    if type(highlights) == dict:
+        return HighlightIndex(**highlights)
+    return HighlightIndex(highlights)
+
+def _readHighlights(highlight_file):
+    # A missing file is ignored, but one that can't be read raises a ValueError naming the file and the line
+    if type(highlight_file) == str and highlight_file != '':
+        try:
+            with open(highlight_file) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            print('Highlight file not found, ignoring.')
+            return None
+        try:
+            return HighlightIndex.fromLines(lines)
+        except ValueError as e:
+            raise ValueError(f'{highlight_file}: {e}') from None
+    return None
+
+def _rearrangeCharacters(strings, width, layout):
+    # Vectorised re-ordering of fixed-width strings, e.g. MM/DD/YY -> 20YY-MM-DD
+    # Each entry of layout is either an index into the input string or a literal character
+    chars = np.asarray(strings, dtype=f'U{width}').view('U1').reshape(-1, width)
+    out = np.empty((len(chars), len(layout)), dtype='U1')
+    for i, c in enumerate(layout):
+        out[:, i] = chars[:, c] if type(c) == int else c
+    return out.view(f'U{len(layout)}')[:, 0]
+
+def _readScheduleColumns(fn, reader='csv'):
+    # Returns {column name: array of strings} for the MLB csv
+    # The stdlib csv module is much quicker to import than astropy, which is only loaded when asked for
+    if reader == 'astropy':
+        from astropy.io import ascii
+        textschedule = ascii.read(fn)
+        columns = {}
+        for name in textschedule.colnames:
+            if textschedule[name].dtype.kind not in ['U', 'S']:
+                # e.g. an empty START TIME column is read as masked floats
+                columns[name] = np.full(len(textschedule), '', dtype='U1')
+            elif hasattr(textschedule[name], 'filled'):
+                columns[name] = np.asarray(textschedule[name].filled(''), dtype=str)
+            else:
+                columns[name] = np.asarray(textschedule[name], dtype=str)
+        return columns
+    
+    with open(fn, newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    return {name: np.asarray(column, dtype=str) for name, column in zip(rows[0], zip(*rows[1:]))}
+
+# Words in SUBJECT or DESCRIPTION that mark a game as outside the regular season, before it starts
+PRESEASON_MARKERS = ['spring training', 'exhibition']
+
+def _isPreseason(subjects, descriptions):
+    text = np.char.lower(np.char.add(np.char.add(np.asarray(subjects, dtype=str), ' '), np.asarray(descriptions, dtype=str)))
+    return np.any([np.char.find(text, marker) >= 0 for marker in PRESEASON_MARKERS], axis=0)
+
+def _readMLBSchedule(fn, team, start=None, reader='csv'):
+    # Parse the MLB schedule once into columns of game ordinal date, start time (minutes), opponent, and location
+    # Doubleheaders simply become more than one game on the same day
+    # The schedule can be one team's or the whole league's, only the team's games are kept
+    # With start=None, the regular season is every game that isn't marked as spring training or an exhibition
+    textschedule = _readScheduleColumns(fn, reader)
+    if start is None:
+        regular = ~_isPreseason(textschedule['SUBJECT'], textschedule.get('DESCRIPTION', np.full(len(textschedule['SUBJECT']), '')))
+        schedule2025 = {name: column[regular] for name, column in textschedule.items()}
     else:
-        ampm_format = ''
+        schedule2025 = {name: column[start:] for name, column in textschedule.items()}
     
-    textschedule = ascii.read(fn)
-    schedule2025 = textschedule[start:]
+    matchup = np.char.partition(np.asarray(schedule2025['SUBJECT'], dtype=str), ' - ')[:, 0]
+    teams = np.char.partition(matchup, ' at ')
+    involved = (teams[:, 0] == team) | (teams[:, 2] == team)
+    schedule2025 = {name: column[involved] for name, column in schedule2025.items()}
+    awayteam, hometeam = teams[involved, 0], teams[involved, 2]
     
-    openingday = datetime.datetime.strptime(f'{schedule2025["START DATE"][0]}', '%m/%d/%y').toordinal()
-    asg_ordinal = datetime.datetime.strptime(asg, '%d/%m/%Y').toordinal()
-    closingday = datetime.datetime.strptime(f'{schedule2025["START DATE"][-1]}', '%m/%d/%y').toordinal()
+    # MM/DD/YY -> datetime64 -> proleptic Gregorian ordinal
+    gamedates = _rearrangeCharacters(schedule2025['START DATE'], 8, ['2', '0', 6, 7, '-', 0, 1, '-', 3, 4]).astype('datetime64[D]')
+    ordinals = gamedates.astype(int) + datetime.date(1970, 1, 1).toordinal()
+    
+    # HH:MM AM/PM, with games that have no start time yet left at midnight
+    minutes = np.zeros(len(ordinals), dtype=int)
+    timed = schedule2025['START TIME'] != ''
+    times = np.asarray(schedule2025['START TIME'][timed], dtype='U8').view('U1').reshape(-1, 8)
+    hours = (times[:, 0:2].astype(int) * [10, 1]).sum(axis=1) % 12 + 12*(times[:, 6] == 'P')
+    minutes[timed] = hours*60 + (times[:, 3:5].astype(int) * [10, 1]).sum(axis=1)
     
-    asciischedule = Table(names=['ordinal_date', 'string_date', 'opponent', 'location', 'start_time', 'highlight'], dtype=[int, 'S10', 'S15', 'S1', 'S5', bool])
+    home = hometeam == team
+    opponents = np.where(home, awayteam, hometeam)
+    locations = np.where(home, 'H', 'A')
     
-    for i in range(openingday, closingday+1, 1):
-        sched_date = schedule2025[schedule2025['START DATE'] == datetime.date.fromordinal(i).strftime('%m/%d/%y')]
+    # Sort by date, then start time, so the first game of a doubleheader comes first
+    order = np.lexsort((minutes, ordinals))
+    
+    return ordinals[order], minutes[order], opponents[order], locations[order]
+
+def streamLeagueSchedule(fn, teams=None, start=None):
+    # Read a league-wide MLB csv in a single pass, and yield (team, games) for every team (or only those in teams),
+    # with games the same as _readMLBSchedule(fn, team, start) would return, ready for _reformatMLBSchedule or renderFormats
+    # The rows are read one at a time, and only the parsed date, start time, opponent, and location of each game are kept
+    # Any team can have a game on the last line, so the teams are yielded once the whole file is read
+    # With start=None, spring training and exhibition games are skipped, otherwise every row from start on is kept
+    ordinal_of = {}
+    minutes_of = {}
+    seasons = {}
+    
+    def finish(team):
+        ordinals, minutes, opponents, locations = [np.array(column) for column in zip(*seasons.pop(team))]
+        order = np.lexsort((minutes, ordinals))
+        return team, (ordinals[order], minutes[order], opponents[order].astype(str), locations[order].astype(str))
+    
+    with open(fn, newline='') as f:
+        # Blank lines are dropped before counting, as in _readScheduleColumns, so start indexes the same rows
+        rows = (row for row in csv.reader(f) if row)
+        columns = {name: i for i, name in enumerate(next(rows))}
+        date_column, time_column, subject_column = columns['START DATE'], columns['START TIME'], columns['SUBJECT']
+        description_column = columns.get('DESCRIPTION')
         
-        if len(sched_date) == 1:
-            sched_date = sched_date[0]
-            if sched_date['START TIME'].dtype != float:
-                gamedatetime = datetime.datetime.strptime(sched_date['START DATE'] + ' ' + sched_date['START TIME'], '%m/%d/%y %I:%M %p')
-            else:
-                gamedatetime = datetime.datetime.strptime(sched_date['START DATE'], '%m/%d/%y')
-            
-            matchup = sched_date['SUBJECT'].split(' - ')[0]
-            awayteam, hometeam = matchup.split(' at ')
+        for i, row in enumerate(rows):
+            if start is not None and i < start:
+                continue
+            subject = row[subject_column]
+            description = row[description_column] if description_column is not None else ''
+            if start is None and any([marker in f'{subject} {description}'.lower() for marker in PRESEASON_MARKERS]):
+                continue
+            awayteam, _, hometeam = subject.partition(' - ')[0].partition(' at ')
             
-            if hometeam == team:
-                loc = 'H'
-                opp = awayteam
-            else:
-                loc = 'A'
-                opp = hometeam
-        elif i == asg_ordinal:
-            loc = ''
-            opp = 'ALL-STAR GAME'
+            # Only a few hundred different dates and start times in a season, so each is parsed once
+            date = row[date_column]
+            if date not in ordinal_of:
+                ordinal_of[date] = datetime.date(2000 + int(date[6:8]), int(date[0:2]), int(date[3:5])).toordinal()
+            start_time = row[time_column]
+            if start_time not in minutes_of:
+                minutes_of[start_time] = (int(start_time[0:2]) % 12 + 12*(start_time[6] == 'P'))*60 + int(start_time[3:5]) if start_time else 0
             
-        else:
-            gamedatetime = datetime.datetime.fromordinal(i)
-            loc = ''
-            opp = 'OFF DAY'
-        
-        if type(highlights) in [list, tuple] and gamedatetime.strftime('%d/%m/%Y') in highlights:
-            highlight = True
-        else:
-            highlight = False
-        
-        if str(hour_format) not in ['12', 'I', '%I']:
-            timestring = gamedatetime.strftime('%H:%M')
-        else:
-            if gamedatetime.strftime('%I:%M %p')[0] == '0':
-                timestring = gamedatetime.strftime('%I:%M'+ampm_format)[1:]
-            else:
-                timestring = gamedatetime.strftime('%I:%M'+ampm_format)
-        
-        asciischedule.add_row([i, gamedatetime.strftime('%d/%m/%Y'), opp, loc, timestring, highlight])
+            for team, opponent, location in [(awayteam, hometeam, 'A'), (hometeam, awayteam, 'H')]:
+                if teams is None or team in teams:
+                    seasons.setdefault(team, []).append((ordinal_of[date], minutes_of[start_time], opponent, location))
     
-    return asciischedule
+    for team in list(seasons):
+        yield finish(team)
 
-# =============================================================================
-# SET IMPORTANT DATES AND LOAD ABBREVIATIONS
-# =============================================================================
-
-ascii_sched = _reformatMLBSchedule(fn, team, asg, start, hour_format, ampm, highlights=highlights)
-
-nickname_to_abbreviation_dict = json.load(open(abbvs))
+def _formatStartTimes(minutes, hour_format, ampm):
+    hours = minutes // 60
+    if str(hour_format) not in ['12', 'I', '%I']:
+        return np.char.add(np.char.mod('%02d:', hours), np.char.mod('%02d', minutes % 60))
+    else:
+        timestrings = np.char.add(np.char.mod('%d:', (hours - 1) % 12 + 1), np.char.mod('%02d', minutes % 60))
+        if ampm == True:
+            timestrings = np.char.add(timestrings, np.where(hours < 12, ' AM', ' PM'))
+        return timestrings
+
+def _loadGames(fn, team, start, reader='csv', cache=None):
+    # With a RenderCache, the parsed games are keyed by the contents of the schedule file
+    if cache is not None:
+        key = hashParameters('games', hashFile(fn), team, start)
+        games = cache.getObject(key)
+        if games is None:
+            games = _readMLBSchedule(fn, team, start, reader)
+            cache.putObject(key, games)
+    else:
+        games = _readMLBSchedule(fn, team, start, reader)
+    return games
+
+def _reformatMLBSchedule(fn, team, asg, start, hour_format, ampm, highlights=None, reader='csv', cache=None, games=None):
+    # games can be passed in already read by _loadGames, otherwise they are read from fn
+    if games is None:
+        games = _loadGames(fn, team, start, reader, cache)
+    game_ordinals, game_minutes, game_opponents, game_locations = games
+    if len(game_ordinals) == 0:
+        raise ValueError(f'No games for {team} in {fn}')
+    
+    openingday = game_ordinals[0]
+    asg_ordinal = datetime.datetime.strptime(asg, '%d/%m/%Y').toordinal()
+    closingday = game_ordinals[-1]
+    
+    ordinal_date = np.arange(openingday, closingday+1)
+    day_index = game_ordinals - openingday
+    
+    # DD/MM/YYYY, from the ISO form of the dates
+    isodates = (ordinal_date - datetime.date(1970, 1, 1).toordinal()).astype('datetime64[D]').astype('U10')
+    string_date = _rearrangeCharacters(isodates, 10, [8, 9, '/', 5, 6, '/', 0, 1, 2, 3])
+    
+    # Every day is an off day until a game says otherwise
+    opponent = np.full(len(ordinal_date), 'OFF DAY', dtype='U15')
+    if openingday <= asg_ordinal <= closingday:
+        opponent[asg_ordinal - openingday] = 'ALL-STAR GAME'
+    location = np.full(len(ordinal_date), '', dtype='U1')
+    start_time = _formatStartTimes(np.zeros(len(ordinal_date), dtype=int), hour_format, ampm).astype('U17')
+    
+    # The first game of each day sets the opponent and location
+    game_days, first_game = np.unique(day_index, return_index=True)
+    opponent[game_days] = game_opponents[first_game]
+    location[game_days] = game_locations[first_game]
+    
+    game_times = _formatStartTimes(game_minutes, hour_format, ampm)
+    start_time[game_days] = game_times[first_game]
+    
+    # A doubleheader shows both start times, one above the other, so the label is no wider than a single game's
+    for i in np.flatnonzero(np.diff(day_index) == 0) + 1:
+        start_time[day_index[i]] = start_time[day_index[i]] + '\n' + game_times[i]
+    
+    highlights = _highlightIndex(highlights)
+    if highlights is not None:
+        highlight = highlights.mask(ordinal_date, opponent, location)
+    else:
+        highlight = np.zeros(len(ordinal_date), dtype=bool)
+    
+    asciischedule = np.rec.fromarrays([ordinal_date, string_date, opponent, location, start_time, highlight], names=['ordinal_date', 'string_date', 'opponent', 'location', 'start_time', 'highlight'])
+    
+    return asciischedule
 
 # =============================================================================
 # Make Calendar Schedule
@@ -281,134 +672,506 @@ nickname_to_abbreviation_dict = json.load(open(abbvs))
 months = {3:'March/April', 5:'May', 6:'June', 7:'July', 8:'August', 9:'September'}
 weekdays = {0:'Monday', 1:'Tuesday', 2:'Wednesday', 3:'Thursday', 4:'Friday', 5:'Saturday', 6:'Sunday'}
 
-
-fig = plt.figure()
-fig.set_size_inches(h=fh*unit_scale, w=fw*unit_scale)
-ax = fig.add_subplot(111)
-ax.set_xlim(0, fw)
-ax.set_ylim(-fh, 0)
-ax.set_aspect('equal')
-if not frame_on:
-    ax.set_axis_off()
-
-#cell_height = 2
-#cell_width = 3
-# Set the cell height and width based off the figure size
-
-# Header
-ax.text(fw*0.5, -v_margin, f'{year} {team} Schedule'.upper(), fontsize=hfs, color=head_colour, horizontalalignment='center', verticalalignment='top', fontweight='bold')
-
-column = 0
-row = cell_height
-
-# Define the anchor points for each month
-month_anchors = {3: [h_margin + m4x*cell_width, v_margin - header_add - month_add + m4y*cell_height], 4: [h_margin+m4x*cell_width, v_margin - header_add - month_add - 1*cell_height + m4y*cell_height]} # This will always be true
-month_shifts_x = {5: m5x*cell_width, 6: m6x*cell_width, 7: m7x*cell_width, 8: m8x*cell_width, 9: m9x*cell_width}
-month_shifts_y = {5: m5y*cell_height, 6: m6y*cell_height, 7: m7y*cell_height, 8: m8y*cell_height, 9: m9y*cell_height}
-for month_number in range(5, 10):
-    monthcol = (month_number - 4)//rows
-    monthrow = (month_number - 4)%rows
-    # Note that the number of columns is actually not used here.
-    # This allows an arbitrary number of months, though it's unlikely to ever not be six.
-    # It will run down a column until it hits the maximum number of rows, or runs out of months
-    month_anchors[month_number] = [h_margin + (7.5*cell_width)*monthcol + month_shifts_x[month_number], v_margin - header_add - month_add*(1 + monthrow) - (6*cell_height)*monthrow + month_shifts_y[month_number]]
-
-current_month = 3
-# Month and week headers
-for month_ordinal in months.keys():
-    ax.text(month_anchors[month_ordinal][0]+cell_width*3.5, month_anchors[month_ordinal][1]+1*cell_height, months[month_ordinal].upper(), fontsize=mfs, color=head_colour, horizontalalignment='center', verticalalignment='center', fontweight='bold')
-    for day in weekdays.keys():
-        ax.text(month_anchors[month_ordinal][0] + (day - weekstart)%7*cell_width + 0.5*cell_width, month_anchors[month_ordinal][1]+0.25*cell_height, weekdays[day].upper(), color=otc, fontsize=dfs, horizontalalignment='center', verticalalignment='center')
-
-ascii_sched.sort('ordinal_date') # It should already be, but just in case
-
-for entry in ascii_sched.iterrows():
-    date = datetime.date.fromordinal(entry[0])
-    week_ordinal = (date.weekday() - weekstart)%7
-    
-    if entry[3] == 'H':
-        fillcolour = hfc
-        textcolour = htc
-        opp = nickname_to_abbreviation_dict[entry[2]]
-        if entry[4] != '00:00':
-            starttime = entry[4]
+def _monthAnchors(p):
+    # The top left corner of the first IDEAL cell of each month, in figure units
+    # Define the anchor points for each month
+    offsets = dict(zip(OFFSET_MONTHS, np.asarray(p['month_offsets']) * [p['cell_width'], p['cell_height']]))
+    month_anchors = {3: [p['h_margin'] + offsets[4][0], p['v_margin'] - p['header_add'] - p['month_add'] + offsets[4][1]], 4: [p['h_margin'] + offsets[4][0], p['v_margin'] - p['header_add'] - p['month_add'] - 1*p['cell_height'] + offsets[4][1]]} # This will always be true
+    for month_number in range(5, 10):
+        monthcol = (month_number - 4)//p['rows']
+        monthrow = (month_number - 4)%p['rows']
+        # Note that the number of columns is actually not used here.
+        # This allows an arbitrary number of months, though it's unlikely to ever not be six.
+        # It will run down a column until it hits the maximum number of rows, or runs out of months
+        month_anchors[month_number] = [p['h_margin'] + (7.5*p['cell_width'])*monthcol + offsets[month_number][0], p['v_margin'] - p['header_add'] - p['month_add']*(1 + monthrow) - (6*p['cell_height'])*monthrow + offsets[month_number][1]]
+    return month_anchors
+
+# Everything in p that the calendar layout depends on. None of it is specific to a team's schedule.
+LAYOUT_PARAMETERS = ['year', 'weekstart', 'rows', 'fw', 'fh', 'unit_scale', 'v_margin', 'h_margin', 'cell_width', 'cell_height', 'header_add', 'month_add', 'frame_on', 'dfs', 'mfs', 'gfs', 'head_colour', 'otc', 'legend_month', 'legend_scale', 'legend_add', 'legend_x_shift', 'month_offsets']
+
+class CalendarLayout:
+    # Everything about the calendar that doesn't depend on a team's games: the month anchors, the cell of every date
+    # from March to September, and the static text (month and weekday headers, legend labels, time zone note)
+    # It also keeps a template figure with the static text already drawn, which renderSchedule stamps each team onto
+    
+    def __init__(self, p):
+        self.p = {name: p[name] for name in LAYOUT_PARAMETERS}
+        p = self.p
+        self.month_anchors = _monthAnchors(p)
+        
+        # Every date of the season's months, and the week they fall in, counting weeks from weekstart
+        year = int(p['year'])
+        self.first_ordinal = datetime.date(year, 3, 1).toordinal()
+        ordinals = np.arange(self.first_ordinal, datetime.date(year, 9, 30).toordinal() + 1)
+        month = (ordinals - datetime.date(1970, 1, 1).toordinal()).astype('datetime64[D]').astype('datetime64[M]').astype(int) % 12 + 1
+        week_ordinal = ((ordinals - 1) % 7 - p['weekstart']) % 7 # Ordinal 1 is a Monday
+        week = (ordinals - 1 - p['weekstart']) // 7
+        
+        # Rows count down from the first week of each month
+        # March is the exception, since its rows line up with April's, which is anchored one row lower
+        first_week = np.array([(datetime.date(year, m, 1).toordinal() - 1 - p['weekstart']) // 7 for m in range(1, 13)])
+        row = (week - first_week[month - 1] + 1) * p['cell_height']
+        march = month == 3
+        row[march] = (week[march] - first_week[4 - 1] + 2) * p['cell_height']
+        
+        # Define the cell centre based on the day of the month
+        # The month anchor is always the top left corner of the first IDEAL cell
+        #     That is, the first cell that COULD BE present in the month, not necessarily the actual first
+        anchors = np.array([self.month_anchors.get(m, [np.nan, np.nan]) for m in range(1, 13)])
+        self.x_centre = anchors[month - 1, 0] + week_ordinal * p['cell_width'] + 0.5*p['cell_width']
+        self.y_centre = anchors[month - 1, 1] - row + 0.5*p['cell_height']
+        
+        # Legend boxes
+        # home_legend_loc = [month_anchors[7][0]+2*cell_width, month_anchors[7][1]-7*cell_height]
+        # away_legend_loc = [month_anchors[7][0]+5*cell_width, month_anchors[7][1]-7*cell_height]
+        self.home_legend_loc = [p['fw']/2.0-1.5*p['cell_width']*p['legend_scale'] + p['legend_x_shift']*p['cell_width'], self.month_anchors[p['legend_month']][1]-5.85*p['cell_height'] + p['legend_add']*p['cell_height']]
+        self.away_legend_loc = [p['fw']/2.0+1.5*p['cell_width']*p['legend_scale'] + p['legend_x_shift']*p['cell_width'], self.month_anchors[p['legend_month']][1]-5.85*p['cell_height'] + p['legend_add']*p['cell_height']]
+        
+        self.static_texts = []
+        # Month and week headers
+        for month_ordinal in months.keys():
+            self.static_texts.append((self.month_anchors[month_ordinal][0]+p['cell_width']*3.5, self.month_anchors[month_ordinal][1]+1*p['cell_height'], months[month_ordinal].upper(), dict(fontsize=p['mfs'], color=p['head_colour'], horizontalalignment='center', verticalalignment='center', fontweight='bold')))
+            for day in weekdays.keys():
+                self.static_texts.append((self.month_anchors[month_ordinal][0] + (day - p['weekstart'])%7*p['cell_width'] + 0.5*p['cell_width'], self.month_anchors[month_ordinal][1]+0.25*p['cell_height'], weekdays[day].upper(), dict(color=p['otc'], fontsize=p['dfs'], horizontalalignment='center', verticalalignment='center')))
+        self.static_texts.append((self.home_legend_loc[0]+0.75*p['cell_width']*p['legend_scale'], self.home_legend_loc[1], 'HOME', dict(color=p['otc'], fontsize=p['gfs'], fontweight='bold', verticalalignment='center')))
+        self.static_texts.append((self.away_legend_loc[0]+0.75*p['cell_width']*p['legend_scale'], self.away_legend_loc[1], 'AWAY', dict(color=p['otc'], fontsize=p['gfs'], fontweight='bold', verticalalignment='center')))
+        # Time Zone Note
+        # ax.text(month_anchors[7][0]+3.5*cell_width, month_anchors[7][1]-8*cell_height, 'All times CDT', fontsize=dfs, horizontalalignment='center', verticalalignment='center')
+        self.static_texts.append((p['fw']/2.0 + p['legend_x_shift']*p['cell_width'], self.month_anchors[p['legend_month']][1]-6.7*p['cell_height'] + p['legend_add']*p['cell_height'], 'All times CDT', dict(fontsize=p['dfs'], horizontalalignment='center', verticalalignment='bottom')))
+        
+        self.lock = threading.Lock()
+        self._template = None
+    
+    def centre(self, ordinal):
+        # The centre of a date's cell
+        i = ordinal - self.first_ordinal
+        if not 0 <= i < len(self.x_centre):
+            raise KeyError(f'{datetime.date.fromordinal(ordinal)} is outside the calendar, which runs from March to September')
+        return self.x_centre[i], self.y_centre[i]
+    
+    def drawStatic(self, fig):
+        # Set up the axes on a new figure and draw the static text, returning the axes
+        p = self.p
+        fig.set_size_inches(h=p['fh']*p['unit_scale'], w=p['fw']*p['unit_scale'])
+        ax = fig.add_subplot(111)
+        ax.set_xlim(0, p['fw'])
+        ax.set_ylim(-p['fh'], 0)
+        ax.set_aspect('equal')
+        if not p['frame_on']:
+            ax.set_axis_off()
+        for x, y, s, kwargs in self.static_texts:
+            ax.text(x, y, s, **kwargs)
+        return ax
+    
+    def template(self):
+        # The template figure, its axes, its Agg canvas, and the static background already rendered on that canvas
+        # Only use it while holding self.lock, and remove anything added to it afterwards
+        if self._template is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            fig = Figure()
+            ax = self.drawStatic(fig)
+            canvas = FigureCanvasAgg(fig)
+            canvas.draw()
+            self._template = (fig, ax, canvas, canvas.copy_from_bbox(fig.bbox))
+        return self._template
+
+def getCalendarLayout(p):
+    # Layouts are shared by every schedule with the same LAYOUT_PARAMETERS, e.g. all 30 teams of a batch
+    return _calendarLayout(json.dumps(p.toDict(LAYOUT_PARAMETERS), sort_keys=True))
+
+@functools.lru_cache(maxsize=16)
+def _calendarLayout(parameters):
+    return CalendarLayout(json.loads(parameters))
+
+def _dayCells(p, days, layout, nickname_to_abbreviation_dict):
+    # Everything drawn for the days, as plain data: fills by colour, borders by (colour, zorder), and (x, y, text, kwargs)
+    fills = {}
+    borders = {}
+    texts = []
+    
+    for entry in days:
+        date = datetime.date.fromordinal(entry[0])
+        
+        if entry[3] == 'H':
+            fillcolour = p['hfc']
+            textcolour = p['htc']
+            opp = nickname_to_abbreviation_dict[entry[2]]
+            if entry[4] != '00:00':
+                starttime = entry[4]
+            else:
+                starttime = ''
+        
+        elif entry[3] == 'A':
+            fillcolour = p['afc']
+            textcolour = p['atc']
+            opp = nickname_to_abbreviation_dict[entry[2]]
+            if entry[4] != '00:00':
+                starttime = entry[4]
+            else:
+                starttime = ''
+        
+        elif entry[2] == 'ALL-STAR GAME':
+            fillcolour = p['asg_fill']
+            textcolour = p['asg_font']
+            starttime = p['asg_location'].upper()
+            #opp = 'ALL-STAR BREAK'
+            opp = 'ASG'
+        
         else:
+            fillcolour = p['ofc']
+            textcolour = p['otc']
             starttime = ''
+            opp = ''
         
-    elif entry[3] == 'A':
-        fillcolour = afc
-        textcolour = atc
-        opp = nickname_to_abbreviation_dict[entry[2]]
-        if entry[4] != '00:00':
-            starttime = entry[4]
+        if entry[5] == True:
+            ec = p['tbc']
+            zo = 10
         else:
-            starttime = ''
-            
-    elif entry[2] == 'ALL-STAR GAME':
-        fillcolour = asg_fill
-        textcolour = asg_font
-        starttime = asg_location.upper()
-        #opp = 'ALL-STAR BREAK'
-        opp = 'ASG'
+            ec = 'w'
+            zo = 2
         
-    else:
-        fillcolour = ofc
-        textcolour = otc
-        starttime = ''
-        opp = ''
-    
-    if entry[5] == True:
-        ec = tbc
-        zo = 10
-    else:
-        ec = 'w'
-        zo = 2
+        x_centre, y_centre = layout.centre(entry[0])
+        
+        # Collect the cell border and fill, to be drawn as one collection per colour
+        left, right = x_centre-p['cell_width']/2.0, x_centre+p['cell_width']/2.0
+        bottom, top = y_centre-p['cell_height']/2.0, y_centre+p['cell_height']/2.0
+        borders.setdefault((ec, zo), []).extend([[(left, bottom), (left, top)], [(right, bottom), (right, top)], [(left, bottom), (right, bottom)], [(left, top), (right, top)]])
+        fills.setdefault(fillcolour, []).append([(left, bottom), (left, top), (right, top), (right, bottom)])
+        
+        # Cell text
+        # Date (upper left)
+        texts.append((x_centre-p['cell_width']/2.0+p['cell_width']*0.06, y_centre+p['cell_height']/2.0-p['cell_height']*0.1, date.day, dict(color=textcolour, fontsize=p['dfs'], verticalalignment='top')))
+        # Opponent (centred, bold)
+        texts.append((x_centre, y_centre, opp, dict(fontsize=p['gfs'], color=textcolour, fontweight='bold', horizontalalignment='center', verticalalignment='center')))
+        # Start time (lower centre) (lower is here set at 20% of the cell's height)
+        # A doubleheader's two lines are smaller and set closer together, so they stay clear of the opponent
+        time_size = dict(fontsize=p['dfs']*DOUBLEHEADER_SCALE, linespacing=1.0) if '\n' in starttime else dict(fontsize=p['dfs'])
+        texts.append((x_centre, y_centre-(p['cell_height']*(0.5 - 0.2)), starttime, dict(time_size, color=textcolour, fontweight='bold', horizontalalignment='center', verticalalignment='center')))
     
-    if date.month != current_month:
-        row = cell_height
-        current_month = date.month
+    return {'fills': fills, 'borders': borders, 'texts': texts}
+
+def _stampSchedule(ax, p, ascii_sched, nickname_to_abbreviation_dict, layout):
+    # Add everything specific to the team to axes set up by layout.drawStatic, returning the artists added, and the month blocks:
+    # {month: (what the month's cells are drawn from, the month's artists)}, with March drawn as part of April's block, as in months
+    # If anything fails, the artists already added are removed again before the error is raised
+    from matplotlib.collections import LineCollection, PolyCollection
+    from matplotlib.patches import Polygon
     
-    elif week_ordinal == 0: # The elif is to stop it catching when the month starts on the first day of the week
-        row += cell_height
+    artists = []
+    blocks = {}
+    try:
+        # Header
+        artists.append(ax.text(p['fw']*0.5, -p['v_margin'], f'{p["year"]} {p["team"]} Schedule'.upper(), fontsize=p['hfs'], color=p['head_colour'], horizontalalignment='center', verticalalignment='top', fontweight='bold'))
+        
+        ascii_sched = np.sort(ascii_sched, order='ordinal_date') # It should already be, but just in case
+        day_months = (ascii_sched['ordinal_date'] - datetime.date(1970, 1, 1).toordinal()).astype('datetime64[D]').astype('datetime64[M]').astype(int) % 12 + 1
+        day_months[day_months == 4] = 3
+        
+        # Cell borders, by (colour, zorder), and fills, by colour, for each month
+        # A few collections draw much faster, and make a much smaller file, than four lines and a polygon per day
+        for month in np.unique(day_months).tolist():
+            cells = _dayCells(p, ascii_sched[day_months == month], layout, nickname_to_abbreviation_dict)
+            month_artists = []
+            for x, y, s, kwargs in cells['texts']:
+                month_artists.append(ax.text(x, y, s, **kwargs))
+            for fillcolour, polygons in cells['fills'].items():
+                month_artists.append(ax.add_collection(PolyCollection(polygons, facecolors=fillcolour if fillcolour != '' else None, edgecolors='none', zorder=1), autolim=False))
+            for (ec, zo), segments in cells['borders'].items():
+                month_artists.append(ax.add_collection(LineCollection(segments, colors=ec, linewidths=p['gfs']/6, capstyle='projecting', zorder=zo), autolim=False))
+            artists.extend(month_artists)
+            blocks[month] = ([cells['texts'], list(cells['fills'].items()), list(cells['borders'].items()), p['gfs']/6], month_artists)
+        
+        # Legend boxes
+        for (x, y), fillcolour in [(layout.home_legend_loc, p['hfc']), (layout.away_legend_loc, p['afc'])]:
+            half_width, half_height = p['cell_width']*p['legend_scale']/2.0, p['cell_height']*p['legend_scale']/2.0
+            artists.append(ax.add_patch(Polygon([(x-half_width, y-half_height), (x-half_width, y+half_height), (x+half_width, y+half_height), (x+half_width, y-half_height)], facecolor=fillcolour, edgecolor='none')))
+    except BaseException:
+        # Take off whatever was added before the failure, so it doesn't stay on a shared template figure
+        for artist in artists:
+            artist.remove()
+        raise
     
-    # Define the cell centre based on the day of the month
-    # The month anchor is always the top left corner of the first IDEAL cell
-    #     That is, the first cell that COULD BE present in the month, not necessarily the actual first
-    x_centre = month_anchors[date.month][0] + week_ordinal * cell_width + 0.5*cell_width
-    y_centre = month_anchors[date.month][1] - row + 0.5*cell_height
+    return artists, blocks
+
+def drawSchedule(p, ascii_sched, nickname_to_abbreviation_dict):
+    # Draw the calendar schedule on a new figure and return it
+    # The figure is made without pyplot, so no GUI backend is ever loaded, and matplotlib is only imported when drawing
+    from matplotlib.figure import Figure
     
-    # Plot the cell normal cell border
-    ax.plot([x_centre-cell_width/2.0, x_centre-cell_width/2.0], [y_centre-cell_height/2.0, y_centre+cell_height/2.0], c=ec, lw=gfs/6, zorder=zo)
-    ax.plot([x_centre+cell_width/2.0, x_centre+cell_width/2.0], [y_centre-cell_height/2.0, y_centre+cell_height/2.0], c=ec, lw=gfs/6, zorder=zo)
-    ax.plot([x_centre-cell_width/2.0, x_centre+cell_width/2.0], [y_centre-cell_height/2.0, y_centre-cell_height/2.0], c=ec, lw=gfs/6, zorder=zo)
-    ax.plot([x_centre-cell_width/2.0, x_centre+cell_width/2.0], [y_centre+cell_height/2.0, y_centre+cell_height/2.0], c=ec, lw=gfs/6, zorder=zo)
+    if p['autofit']:
+        p = p.withSizes(_fitFontSizes(p, ascii_sched))
+    layout = getCalendarLayout(p)
+    fig = Figure()
+    ax = layout.drawStatic(fig)
+    _stampSchedule(ax, p, ascii_sched, nickname_to_abbreviation_dict, layout)
     
-    # Fill the cell with the appropriate colour
-    ax.fill((x_centre-cell_width/2.0, x_centre-cell_width/2.0, x_centre+cell_width/2.0, x_centre+cell_width/2.0, x_centre-cell_width/2.0), (y_centre-cell_height/2.0, y_centre+cell_height/2.0, y_centre+cell_height/2.0, y_centre-cell_height/2.0, y_centre-cell_height/2.0), fillcolour)
+    return fig
+
+def _figureBytes(fig, fmt, bbox_inches='tight', dpi=None):
+    # A precomputed bounding box (in inches, already padded) saves savefig from drawing the whole figure once just to find it
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches=bbox_inches, pad_inches=0.1, dpi=dpi if dpi is not None else 'figure')
+    return buffer.getvalue()
+
+def _pixelExtent(artist, ax, renderer):
+    # A box on the canvas around everything the artist draws, or None for an empty text
+    # Collections have no window extent until they are drawn, so theirs comes from their data limits. Texts are bounded from
+    # the cached extents of _textExtent, with room to spare, rather than laid out again, which costs more than drawing them.
+    from matplotlib.collections import Collection
+    from matplotlib.text import Text
+    from matplotlib.transforms import Bbox
+    if isinstance(artist, Collection):
+        return artist.get_datalim(ax.transData).transformed(ax.transData)
+    if not isinstance(artist, Text):
+        return artist.get_window_extent(renderer)
+    if artist.get_text() == '':
+        return None
     
-    # Cell text
-    # Date (upper left)
-    ax.text(x_centre-cell_width/2.0+cell_width*0.06, y_centre+cell_height/2.0-cell_height*0.1, date.day, color=textcolour, fontsize=dfs, verticalalignment='top')
-    # Opponent (centred, bold)
-    ax.text(x_centre, y_centre, opp, fontsize=gfs, color=textcolour, fontweight='bold', horizontalalignment='center', verticalalignment='center')
-    # Start time (lower centre) (lower is here set at 20% of the cell's height)
-    ax.text(x_centre, y_centre-(cell_height*(0.5 - 0.2)), starttime, fontsize=dfs, color=textcolour, fontweight='bold', horizontalalignment='center', verticalalignment='center')
-
-# Legend boxes
-# home_legend_loc = [month_anchors[7][0]+2*cell_width, month_anchors[7][1]-7*cell_height]
-# away_legend_loc = [month_anchors[7][0]+5*cell_width, month_anchors[7][1]-7*cell_height]
-
-home_legend_loc = [fw/2.0-1.5*cell_width*legend_scale + legend_x_shift*cell_width, month_anchors[legend_month][1]-5.85*cell_height + legend_add*cell_height]
-away_legend_loc = [fw/2.0+1.5*cell_width*legend_scale + legend_x_shift*cell_width, month_anchors[legend_month][1]-5.85*cell_height + legend_add*cell_height]
-
-ax.fill((home_legend_loc[0]-cell_width*legend_scale/2.0, home_legend_loc[0]-cell_width*legend_scale/2.0, home_legend_loc[0]+cell_width*legend_scale/2.0, home_legend_loc[0]+cell_width*legend_scale/2.0, home_legend_loc[0]-cell_width*legend_scale/2.0), (home_legend_loc[1]-cell_height*legend_scale/2.0, home_legend_loc[1]+cell_height*legend_scale/2.0, home_legend_loc[1]+cell_height*legend_scale/2.0, home_legend_loc[1]-cell_height*legend_scale/2.0, home_legend_loc[1]-cell_height*legend_scale/2.0), hfc)
-ax.text(home_legend_loc[0]+0.75*cell_width*legend_scale, home_legend_loc[1], 'HOME', color=otc, fontsize=gfs, fontweight='bold', verticalalignment='center')
-
-ax.fill((away_legend_loc[0]-cell_width*legend_scale/2.0, away_legend_loc[0]-cell_width*legend_scale/2.0, away_legend_loc[0]+cell_width*legend_scale/2.0, away_legend_loc[0]+cell_width*legend_scale/2.0, away_legend_loc[0]-cell_width*legend_scale/2.0), (away_legend_loc[1]-cell_height*legend_scale/2.0, away_legend_loc[1]+cell_height*legend_scale/2.0, away_legend_loc[1]+cell_height*legend_scale/2.0, away_legend_loc[1]-cell_height*legend_scale/2.0, away_legend_loc[1]-cell_height*legend_scale/2.0), afc)
-ax.text(away_legend_loc[0]+0.75*cell_width*legend_scale, away_legend_loc[1], 'AWAY', color=otc, fontsize=gfs, fontweight='bold', verticalalignment='center')
-
-# Time Zone Note
-# ax.text(month_anchors[7][0]+3.5*cell_width, month_anchors[7][1]-8*cell_height, 'All times CDT', fontsize=dfs, horizontalalignment='center', verticalalignment='center')
-ax.text(fw/2.0 + legend_x_shift*cell_width, month_anchors[legend_month][1]-6.7*cell_height + legend_add*cell_height, 'All times CDT', fontsize=dfs, horizontalalignment='center', verticalalignment='bottom')
+    scale = artist.get_fontsize()/10*renderer.dpi/72
+    lines = [_textExtent(line, artist.get_fontweight()) for line in artist.get_text().split('\n')]
+    width, height = max([extent[0] for extent in lines])*scale, sum([extent[1] for extent in lines])*scale*1.2
+    x, y = ax.transData.transform(artist.get_position())
+    x0 = {'left': x, 'center': x - width/2, 'right': x - width}[artist.get_horizontalalignment()]
+    y0 = {'bottom': y, 'baseline': y - height/2, 'center': y - height/2, 'center_baseline': y - height/2, 'top': y - height}[artist.get_verticalalignment()]
+    return Bbox.from_bounds(x0, y0, width, height).padded(2 + 0.25*artist.get_fontsize()*renderer.dpi/72)
+
+def _monthTiles(fig, canvas, image, artists, blocks):
+    # {month: (cache key, (top, bottom, left, right) in pixels of the canvas)} for every month block that can be kept as a raster tile
+    # A tile covers the month's artists, padded by their line width, and is keyed by what they are drawn from, where they land on
+    # the canvas, and the static background underneath, so a tile is only reused where it would be drawn exactly the same.
+    # Months whose tiles would overlap another month or any other artist are left out, and drawn as usual.
+    from matplotlib.transforms import Bbox
+    renderer = canvas.get_renderer()
+    ax = fig.axes[0]
+    month_artists = {id(artist) for parts, block_artists in blocks.values() for artist in block_artists}
+    others = [_pixelExtent(artist, ax, renderer) for artist in artists if id(artist) not in month_artists]
+    others = [extent for extent in others if extent is not None]
+    
+    boxes = {}
+    for month, (parts, block_artists) in blocks.items():
+        box = Bbox.union([extent for extent in [_pixelExtent(artist, ax, renderer) for artist in block_artists] if extent is not None])
+        boxes[month] = box.padded(np.ceil(parts[-1]*fig.dpi/72) + 2) # Line width, in pixels, plus antialiasing
+    
+    tiles = {}
+    transform = ax.transData.get_matrix().tolist()
+    for month, box in boxes.items():
+        if any([box.overlaps(other) for other in others + [boxes[m] for m in boxes if m != month]]):
+            continue
+        top, bottom = max(image.shape[0] - int(np.ceil(box.y1)), 0), min(image.shape[0] - int(np.floor(box.y0)), image.shape[0])
+        left, right = max(int(np.floor(box.x0)), 0), min(int(np.ceil(box.x1)), image.shape[1])
+        if top >= bottom or left >= right:
+            continue
+        background = hashlib.sha256(image[top:bottom, left:right].tobytes()).hexdigest()
+        tiles[month] = (hashParameters('tile', blocks[month][0], transform, [top, bottom, left, right], background, fig.dpi), (top, bottom, left, right))
+    return tiles
+
+def _blitPNG(fig, ax, canvas, background, artists, bbox_inches, blocks=None, cache=None, profiler=None):
+    # Draw only the new artists over the pre-rendered background, then crop to the bounding box
+    # With a cache and the month blocks from _stampSchedule, each month is kept as a raster tile (see _monthTiles),
+    # so when one month's offset or highlights change, only that month is drawn again
+    from matplotlib.image import imsave
+    canvas.restore_region(background)
+    image = np.asarray(canvas.buffer_rgba())
+    by_zorder = lambda artist: artist.get_zorder()
+    
+    tiled = set()
+    if cache is not None and blocks:
+        for month, (key, (top, bottom, left, right)) in _monthTiles(fig, canvas, image, artists, blocks).items():
+            tile = cache.getObject(key)
+            if tile is None:
+                # The tile's area only has the background in it, so the month can be drawn by itself and copied out
+                for artist in sorted(blocks[month][1], key=by_zorder):
+                    ax.draw_artist(artist)
+                cache.putObject(key, image[top:bottom, left:right].copy())
+            else:
+                image[top:bottom, left:right] = tile
+                if profiler is not None:
+                    profiler.count('tile_hits')
+            tiled.update([id(artist) for artist in blocks[month][1]])
+    
+    for artist in sorted([artist for artist in artists if id(artist) not in tiled], key=by_zorder):
+        ax.draw_artist(artist)
+    
+    bbox = bbox_inches.transformed(fig.dpi_scale_trans)
+    # The same size as savefig(bbox_inches='tight'), which truncates, but cropped to whole pixels rather than shifted
+    x0, y0 = max(int(round(bbox.x0)), 0), max(int(round(image.shape[0] - bbox.y1)), 0)
+    
+    buffer = io.BytesIO()
+    imsave(buffer, image[y0:y0 + int(bbox.height), x0:x0 + int(bbox.width)], format='png', dpi=fig.dpi)
+    return buffer.getvalue()
+
+@contextlib.contextmanager
+def _atomicFile(output):
+    # A temporary file next to the output, moved into place once it is written, so a partly written schedule is never left behind
+    directory, filename = os.path.split(os.path.abspath(output))
+    tmp = os.path.join(directory, f'.{filename}.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            yield f
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _writeAtomic(output, data):
+    with _atomicFile(output) as f:
+        f.write(data)
+    return output
+
+@functools.lru_cache(maxsize=None)
+def _loadAbbreviations(abbvs):
+    # Loaded once per process, then shared by every schedule
+    return json.load(open(abbvs))
+
+@contextlib.contextmanager
+def _stampedTemplate(p, highlights=None, cache=None, profiler=None, games=None):
+    # Stamp the team onto the layout's template figure, rather than building a new one, and take the stamp off again afterwards
+    # Yields the figure, axes, canvas, static background, the stamped artists, the month blocks, and the tight bounding box,
+    # all while holding the layout's lock
+    
+    # =============================================================================
+    # SET IMPORTANT DATES AND LOAD ABBREVIATIONS
+    # =============================================================================
+    
+    if games is None:
+        with profileStage(profiler, 'read'):
+            games = _loadGames(p['fn'], p['team'], p['start'], p['reader'], cache)
+    with profileStage(profiler, 'reformat'):
+        ascii_sched = _reformatMLBSchedule(p['fn'], p['team'], p['asg'], p['start'], p['hour_format'], p['ampm'], highlights=highlights, games=games)
+    
+    nickname_to_abbreviation_dict = _loadAbbreviations(p['abbvs'])
+    
+    if p['autofit']:
+        # The font sizes, and the layout with them, come from the labels of the schedule just reformatted
+        with profileStage(profiler, 'autofit'):
+            p = p.withSizes(_fitFontSizes(p, ascii_sched))
+    
+    with profileStage(profiler, 'layout'):
+        layout = getCalendarLayout(p)
+    with layout.lock:
+        with profileStage(profiler, 'template'):
+            fig, ax, canvas, background = layout.template()
+        artists = []
+        try:
+            with profileStage(profiler, 'artists'):
+                artists, blocks = _stampSchedule(ax, p, ascii_sched, nickname_to_abbreviation_dict, layout)
+            if profiler is not None:
+                profiler.count('artists', len(artists))
+                profiler.count('static_artists', len(layout.static_texts))
+            with profileStage(profiler, 'bbox'):
+                # The same box savefig(bbox_inches='tight') would find, from the text extents alone, without drawing anything
+                bbox_inches = fig.get_tightbbox(canvas.get_renderer()).padded(0.1)
+            yield fig, ax, canvas, background, artists, blocks, bbox_inches
+        finally:
+            for artist in artists:
+                artist.remove()
+
+def renderFormats(p, formats=('pdf',), dpi=None, files=None, highlights=None, cache=None, profiler=None, games=None):
+    # Read everything a schedule needs, draw it once, and save it in every format in formats (pdf, png, svg, ...)
+    # Returns {format: bytes}, all in memory. If files has a file object for a format, the bytes are written there too.
+    # dpi only affects raster formats, and defaults to the figure's.
+    # The highlights come from p['highlight_file'] unless given, as a HighlightIndex or a list of dd/mm/yyyy dates
+    # With a cache (see scheduleCache.py), an unchanged schedule, config, and highlight set is returned straight from the cache,
+    # and a blitted PNG reuses the raster tiles of the months that haven't changed. Vector formats are always saved whole.
+    # With a StageProfiler (see scheduleProfile.py), each stage is timed, and the artists and output sizes are counted
+    # The team's games can be passed in already parsed, e.g. by streamLeagueSchedule, otherwise they are read from p['fn']
+    if highlights is None:
+        highlights = _readHighlights(p['highlight_file'])
+    highlights = _highlightIndex(highlights)
+    
+    outputs = {}
+    output_keys = {}
+    if cache is not None:
+        with profileStage(profiler, 'cache lookup'):
+            # The highlight file is keyed by its dates and rules, and the schedule and abbreviation files by their contents
+            resolved = p.digest(exclude=['fn', 'abbvs', 'highlight_file', 'reader'])
+            for fmt in formats:
+                output_keys[fmt] = hashParameters('output', resolved, highlights.key() if highlights is not None else None, hashFile(p['fn']), hashFile(p['abbvs']), fmt, dpi)
+                data = cache.get(output_keys[fmt])
+                if data is not None:
+                    outputs[fmt] = data
+        if profiler is not None:
+            profiler.count('cache_hits', len(outputs))
+    
+    missing = [fmt for fmt in formats if fmt not in outputs]
+    if missing:
+        with _stampedTemplate(p, highlights, cache, profiler, games) as (fig, ax, canvas, background, artists, blocks, bbox_inches):
+            # Every format is saved from the same stamped figure and bounding box
+            for fmt in missing:
+                with profileStage(profiler, f'savefig {fmt}'):
+                    if fmt == 'png' and dpi in [None, fig.dpi]:
+                        # Only draw the team over the pre-rendered static background, and only the months not already cached
+                        outputs[fmt] = _blitPNG(fig, ax, canvas, background, artists, bbox_inches, blocks, cache, profiler)
+                    else:
+                        outputs[fmt] = _figureBytes(fig, fmt, bbox_inches, dpi)
+        
+        if cache is not None:
+            for fmt in missing:
+                cache.put(output_keys[fmt], outputs[fmt])
+    
+    if profiler is not None:
+        for fmt in formats:
+            profiler.count(f'{fmt}_bytes', len(outputs[fmt]))
+    
+    for fmt, f in (files or {}).items():
+        f.write(outputs[fmt])
+    
+    return {fmt: outputs[fmt] for fmt in formats}
+
+def renderSchedule(p, fmt='pdf', dpi=None, highlights=None, cache=None, profiler=None, games=None):
+    # The bytes of a single format, see renderFormats
+    return renderFormats(p, [fmt], dpi=dpi, highlights=highlights, cache=cache, profiler=profiler, games=games)[fmt]
+
+def makeSchedule(p, output=None, formats=None, dpi=None, cache=None, profiler=None, games=None, highlights=None):
+    # Render a schedule and save it, in the output's format, or once for each of formats next to it. Returns the output file names.
+    if output is None:
+        output = f'{p["year"]}_{p["team"]}_Schedule.pdf'
+    stem, extension = os.path.splitext(output)
+    if formats is None:
+        formats = [extension[1:]]
+    
+    outputs = renderFormats(p, formats, dpi=dpi, highlights=highlights, cache=cache, profiler=profiler, games=games)
+    with profileStage(profiler, 'write'):
+        return [_writeAtomic(f'{stem}.{fmt}', data) for fmt, data in outputs.items()]
+
+def renderPages(pages, output, cache=None, profiler=None):
+    # Save many schedules as the pages of one PDF, in order, e.g. one team with a page per ticket plan
+    # pages is an iterable of (p, highlights) or (p, highlights, games), and can be a generator, so only one page is ever held at once
+    # Each page is stamped onto its layout's template and flushed to the file before the next, so there is only ever one figure per layout
+    # With a cache (e.g. a MemoryCache), each schedule is parsed once and shared between the pages
+    # Returns the number of pages
+    from matplotlib.backends.backend_pdf import PdfPages
+    
+    n = 0
+    with _atomicFile(output) as f, PdfPages(f) as pdf:
+        for page in pages:
+            p, highlights, games = (tuple(page) + (None,))[:3]
+            if highlights is None:
+                highlights = _readHighlights(p['highlight_file'])
+            with _stampedTemplate(p, _highlightIndex(highlights), cache, profiler, games) as (fig, ax, canvas, background, artists, blocks, bbox_inches):
+                with profileStage(profiler, 'savefig page'):
+                    pdf.savefig(fig, bbox_inches=bbox_inches, pad_inches=0.1)
+            n += 1
+    return n
+
+def main(argv=None):
+    # Parse arguments
+    args = parser.parse_args(argv)
+    
+    profiler = StageProfiler(args.trace_memory) if args.profile else None
+    
+    with profileStage(profiler, 'config'):
+        config = _readConfig(args.config_file)
+        p = ScheduleConfig(args.year, args.team, config, vars(args))
+    
+    cache = RenderCache(args.cache_dir, args.cache_size*2**20) if args.cache_dir else None
+    
+    makeSchedule(p, args.output, formats=args.formats, dpi=args.dpi, cache=cache, profiler=profiler)
+    
+    if profiler is not None:
+        profiler.write(args.profile)
 
-fig.savefig(f'{year}_{team}_Schedule.pdf', bbox_inches='tight', pad_inches=0.1)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import collections
+import hashlib
+import json
+import os
+import pickle
+import threading
+import uuid
+
+# =============================================================================
+# Content-addressed, size-bounded cache for parsed schedules and renders
+# =============================================================================
+
+def hashFile(fn):
+    # SHA-256 of a file's contents, so a cache entry follows the data rather than the file name or time stamp
+    sha = hashlib.sha256()
+    with open(fn, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**16), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def hashParameters(*parts):
+    # SHA-256 of any JSON-able values. Dicts are hashed with sorted keys, so the order they were built in doesn't matter
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+class RenderCache:
+    # Every entry is one file, named by its key, in a single directory
+    # Reading an entry touches it, so the least recently used entries are the first to go once the directory passes max_bytes
+    # The directory's size is scanned once, then kept up to date by put, so it is only rescanned when something has to be evicted.
+    # Other processes sharing the directory aren't counted until then, which can let it run over max_bytes until the next eviction.
+
+    def __init__(self, directory='.schedule_cache', max_bytes=100*2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum([size for mtime, size, path in self._entries()])
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        # Returns the cached bytes, or None on a miss
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Including an entry evicted by another process between the read and the touch
+            return None
+        return data
+
+    def put(self, key, data):
+        tmp = self._path(f'.{key}.{uuid.uuid4().hex}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        try:
+            self.total_bytes -= os.path.getsize(self._path(key)) # Replacing an entry
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, self._path(key))
+        self.total_bytes += len(data)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def getObject(self, key):
+        data = self.get(key)
+        return pickle.loads(data) if data is not None else None
+
+    def putObject(self, key, obj):
+        self.put(key, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _entries(self):
+        # (mtime, size, path) of every entry, skipping temporary files
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum([size for mtime, size, path in entries])
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.total_bytes = total
+
+class MemoryCache:
+    # The same interface as RenderCache, but kept in memory for a long-running process, and safe to share between threads
+    # Objects are stored as they are, not pickled, so they must not be modified after they are put in
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, data):
+        with self.lock:
+            self.entries[key] = data
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    getObject = get
+    putObject = put
@@ -0,0 +1,56 @@
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+
+# =============================================================================
+# Per-stage timing and allocation profiling
+# =============================================================================
+
+class StageProfiler:
+    # Records the wall time and net allocated memory blocks of each stage, plus any counts (artists, output bytes, ...)
+    # With trace_memory, the peak traced memory of each stage is recorded too, at the cost of slowing everything down
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.counts = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        blocks_start = sys.getallocatedblocks()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'stage': name, 'seconds': time.perf_counter() - t0, 'allocated_blocks': sys.getallocatedblocks() - blocks_start}
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1] - traced_start
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(record)
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def report(self):
+        return {'stages': self.stages, 'counts': self.counts, 'seconds': sum([record['seconds'] for record in self.stages])}
+
+    def write(self, fn):
+        # JSON to a file, or to stdout for '-'
+        if fn == '-':
+            print(json.dumps(self.report(), indent=4))
+        else:
+            with open(fn, 'w') as f:
+                json.dump(self.report(), f, indent=4)
+
+def profileStage(profiler, name):
+    # A no-op unless there is a profiler, so the stages can stay in place in normal runs
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
@@ -0,0 +1,220 @@
+import argparse
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import os
+import threading
+import time
+
+import displaySchedule
+from scheduleCache import MemoryCache
+
+# =============================================================================
+# Long-running render server
+# =============================================================================
+
+parser = argparse.ArgumentParser(description='Serve printable schedules over local HTTP, keeping matplotlib, fonts, abbreviations, and parsed schedules warm between requests')
+
+parser.add_argument('--host', type=str, help='Default is localhost only', default='127.0.0.1')
+parser.add_argument('--port', type=int, help='', default=8765)
+parser.add_argument('--max_requests', type=int, help='Most requests in flight at once. Any more are turned away with 503.', default=8)
+parser.add_argument('--cache_entries', type=int, help='Number of parsed schedules, PNG month tiles, and finished renders to keep in memory', default=256)
+parser.add_argument('--data_dir', type=str, help='Directory of the schedule, abbreviation, and highlight files. Requests can only name files inside it. Default is the current directory.', default='.')
+
+CONTENT_TYPES = {'pdf': 'application/pdf', 'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Parameters that name files, which are looked up in the data directory
+PATH_PARAMETERS = ['fn', 'abbvs', 'highlight_file']
+
+# Config values that have to be whole numbers, and colours. Every other parameter with a numeric default, the derived sizes,
+# and the month offsets have to be numbers.
+INTEGER_PARAMETERS = ['start', 'weekstart', 'legend_month', 'rows', 'columns']
+COLOUR_PARAMETERS = ['hfc', 'htc', 'afc', 'atc', 'ofc', 'otc', 'head_colour', 'tbc', 'asg_fill', 'asg_font']
+NUMBER_PARAMETERS = [name for name, default in displaySchedule.ScheduleConfig.DEFAULTS.items() if type(default) in [int, float]] + displaySchedule.ScheduleConfig.DERIVED + [f'm{month}{axis}' for month in displaySchedule.OFFSET_MONTHS for axis in 'xy']
+
+def _number(name, value, integer=False):
+    # value as a float (or an int), or a ValueError if it isn't a number
+    try:
+        if type(value) == bool:
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number, not {value!r}') from None
+    if integer:
+        if not number.is_integer():
+            raise ValueError(f'{name} must be a whole number, not {value!r}')
+        return int(number)
+    return number
+
+def _checkConfig(config):
+    # A copy of a request's config with its numbers coerced, or a ValueError for a value that isn't the right type
+    if type(config) != dict:
+        raise ValueError('config must be an object')
+    config = dict(config)
+    for name in NUMBER_PARAMETERS + ['start']:
+        if config.get(name) is not None:
+            config[name] = _number(name, config[name], name in INTEGER_PARAMETERS)
+    return config
+
+def _checkColours(p):
+    # A ValueError for any colour matplotlib can't draw. The ASG colours can be left empty if there is no ASG date.
+    from matplotlib.colors import is_color_like
+    for name in COLOUR_PARAMETERS:
+        if name in ['asg_fill', 'asg_font'] and p[name] == '' and p['asg'] == displaySchedule.ScheduleConfig.DEFAULTS['asg']:
+            continue
+        if not is_color_like(p[name]):
+            raise ValueError(f'{name} {p[name]!r} is not a colour')
+
+def _dataPath(data_dir, fn):
+    # fn within data_dir, or a ValueError if it leads anywhere else (an absolute path, '..', or a link out of the directory)
+    path = os.path.realpath(os.path.join(data_dir, fn))
+    if os.path.commonpath([path, data_dir]) != data_dir:
+        raise ValueError(f'{fn} is outside the data directory')
+    return path
+
+class RenderMetrics:
+    # Per-request latency, kept for the most recent requests only
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.latencies = []
+        self.counts = {'ok': 0, 'error': 0, 'rejected': 0}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def record(self, status, seconds):
+        with self.lock:
+            self.counts[status] += 1
+            if status == 'ok':
+                self.latencies = (self.latencies + [seconds])[-self.window:]
+
+    def report(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            report = dict(self.counts, in_flight=self.in_flight)
+        if latencies:
+            report['latency_ms'] = {'p50': latencies[len(latencies)//2]*1e3, 'p95': latencies[int(len(latencies)*0.95)]*1e3, 'max': latencies[-1]*1e3}
+        return report
+
+def _warmUp():
+    # Load the drawing and output backends, and the font files, before the first request
+    from matplotlib.figure import Figure
+    fig = Figure()
+    fig.text(0.5, 0.5, 'WARM UP', fontweight='bold')
+    fig.text(0.5, 0.25, 'warm up')
+    for fmt in CONTENT_TYPES:
+        fig.savefig(io.BytesIO(), format=fmt)
+
+class ScheduleHandler(BaseHTTPRequestHandler):
+    # POST /render with a JSON body of
+    #     {"year": ..., "team": ..., "config": {same keys as schedule_parameters.json}, "highlights": ["dd/mm/yyyy", ...], "format": "pdf", "dpi": 100}
+    # returns the schedule. The highlights can also be {"dates": [...], "ranges": [["dd/mm/yyyy", "dd/mm/yyyy"], ...], "rules": [{"weekday": "Friday", "location": "home"}, ...]}.
+    # File names in the config ("fn", "abbvs", "highlight_file") are relative to the server's data directory, and can't leave it.
+    # The highlight file is only read if the request doesn't give "highlights".
+    # A bad request gets 400, and a request that fails while rendering gets 500.
+    # GET /metrics returns the request counts and latencies.
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        self._send(200, 'application/json', json.dumps(self.server.metrics.report()).encode())
+
+    def do_POST(self):
+        if self.path != '/render':
+            self.send_error(404)
+            return
+
+        if not self.server.slots.acquire(blocking=False):
+            self.server.metrics.record('rejected', 0)
+            self.send_error(503, 'Too many requests in flight')
+            return
+
+        t0 = time.perf_counter()
+        with self.server.metrics.lock:
+            self.server.metrics.in_flight += 1
+        try:
+            try:
+                p, fmt, dpi, highlights = self._parseRequest()
+            except Exception as e:
+                self._fail(400, e, t0)
+                return
+            try:
+                # matplotlib's text rendering shares font objects between figures, so only one schedule is drawn at a time
+                # Cached renders return almost at once, so they only hold the lock briefly
+                with self.server.render_lock:
+                    data = displaySchedule.renderSchedule(p, fmt, dpi=dpi, highlights=highlights, cache=self.server.cache)
+            except Exception as e:
+                self._fail(500, e, t0)
+                return
+        finally:
+            with self.server.metrics.lock:
+                self.server.metrics.in_flight -= 1
+            self.server.slots.release()
+
+        seconds = time.perf_counter() - t0
+        self.server.metrics.record('ok', seconds)
+        self._send(200, CONTENT_TYPES[fmt], data, {'X-Render-Time-ms': f'{seconds*1e3:.1f}'})
+
+    def _parseRequest(self):
+        # The config, format, dpi, and HighlightIndex of the request, or an exception if any of it is missing or invalid
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        fmt = request.get('format', 'pdf')
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f'Unknown format {fmt}, expected one of {list(CONTENT_TYPES)}')
+        
+        dpi = _number('dpi', request['dpi']) if request.get('dpi') is not None else None
+        
+        year, team, config = str(request['year']), request['team'], _checkConfig(request.get('config', {}))
+        p = displaySchedule.ScheduleConfig(year, team, config)
+        paths = {name: _dataPath(self.server.data_dir, p[name]) for name in PATH_PARAMETERS if p[name]}
+        for name in paths:
+            if not os.path.isfile(paths[name]):
+                raise ValueError(f'{name} {p[name]} not found')
+        p = displaySchedule.ScheduleConfig(year, team, config, paths)
+        datetime.datetime.strptime(p['asg'], '%d/%m/%Y')
+        _checkColours(p)
+        
+        # Highlights given in the request take the place of the config's highlight file
+        if 'highlights' in request:
+            highlights = displaySchedule._highlightIndex(request['highlights'])
+        else:
+            highlights = displaySchedule._readHighlights(p['highlight_file'])
+        return p, fmt, dpi, highlights if highlights is not None else displaySchedule.HighlightIndex()
+
+    def _fail(self, code, e, t0):
+        self.server.metrics.record('error', time.perf_counter() - t0)
+        self.send_error(code, f'{type(e).__name__}: {e}')
+
+    def _send(self, code, content_type, data, headers=None):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+def makeServer(host='127.0.0.1', port=8765, max_requests=8, cache_entries=256, data_dir='.'):
+    server = ThreadingHTTPServer((host, port), ScheduleHandler)
+    server.daemon_threads = True
+    server.data_dir = os.path.realpath(data_dir)
+    server.slots = threading.BoundedSemaphore(max_requests)
+    server.render_lock = threading.Lock()
+    server.cache = MemoryCache(cache_entries)
+    server.metrics = RenderMetrics()
+    _warmUp()
+    return server
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    server = makeServer(args.host, args.port, args.max_requests, args.cache_entries, args.data_dir)
+    print(f'Serving schedules on http://{args.host}:{server.server_address[1]}/render')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+
+from displaySchedule import HighlightIndex, _readHighlights
+
+def ordinal(day, month, year=2026):
+    return datetime.date(year, month, day).toordinal()
+
+def test_fromLines_dates_ranges_and_rules():
+    lines = ['# Ticket plan', '30/03/2026', '', '  04/04/2026  # opening weekend', '01/06/2026 - 03/06/2026', 'weekday=Friday,Saturday; location=home', 'opponent=Cubs,White Sox', '   ']
+    index = HighlightIndex.fromLines(lines)
+
+    assert index.ordinals == {ordinal(30, 3), ordinal(4, 4), ordinal(1, 6), ordinal(2, 6), ordinal(3, 6)}
+    assert index.rules == ((frozenset([4, 5]), 'H', None), (None, None, frozenset(['Cubs', 'White Sox'])))
+
+def test_fromLines_matches_the_same_index_given_directly():
+    lines = ['01/06/2026 - 03/06/2026', 'weekday = friday ; location = Home']
+    index = HighlightIndex.fromLines(lines)
+
+    assert index.key() == HighlightIndex(ranges=[(ordinal(1, 6), ordinal(3, 6))], rules=[{'weekday': 4, 'location': 'H'}]).key()
+
+def test_mask():
+    index = HighlightIndex.fromLines(['30/03/2026', 'weekday=Friday; location=home', 'opponent=Cubs'])
+    # Monday 30/03 away, Friday 03/04 home, Friday 10/04 away, Saturday 11/04 away to the Cubs
+    ordinals = [ordinal(30, 3), ordinal(3, 4), ordinal(10, 4), ordinal(11, 4)]
+
+    assert index.mask(ordinals, ['Tigers', 'Tigers', 'Tigers', 'Cubs'], ['A', 'H', 'A', 'A']).tolist() == [True, True, False, True]
+
+def test_readHighlights_without_a_trailing_newline(tmp_path):
+    fn = tmp_path / 'highlights.txt'
+    fn.write_text('# Weekend\n30/03/2026\n04/04/2026')
+    index = _readHighlights(str(fn))
+
+    assert index.ordinals == {ordinal(30, 3), ordinal(4, 4)}
+    assert index.rules == ()
+
+def test_fromLines_names_the_bad_line():
+    for line, message in [('weekday=fryday', 'Unknown weekday fryday'), ('team=Cubs', 'Unknown rule key team'), ('location=road', 'Unknown location road'), ('31/02/2026', 'day is out of range')]:
+        with pytest.raises(ValueError, match=f'Line 3 \\({line}\\): {message}'):
+            HighlightIndex.fromLines(['# Ticket plan', '30/03/2026', line])
+
+def test_readHighlights_names_the_file(tmp_path):
+    fn = tmp_path / 'highlights.txt'
+    fn.write_text('30/03/2026\nweekday=fryday\n')
+
+    with pytest.raises(ValueError, match='highlights.txt: Line 2'):
+        _readHighlights(str(fn))
+
+def test_readHighlights_missing_file(tmp_path):
+    assert _readHighlights(str(tmp_path / 'missing.txt')) is None